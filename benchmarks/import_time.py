@@ -0,0 +1,53 @@
+"""
+Measures the time taken by "import exh" in a fresh interpreter, and lists the modules that take the longest to import.
+
+Usage: python import_time.py [--repeat N] [--top K] [--module exh]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def import_times(module):
+	"""
+	Imports "module" in a new interpreter with "-X importtime"
+
+	Returns:
+		dict[str, int] -- maps every imported module to its cumulative import time, in microseconds
+	"""
+	env    = dict(os.environ, PYTHONPATH = ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+	result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + module],
+	                        env = env, stderr = subprocess.PIPE, universal_newlines = True, check = True)
+
+	times = dict()
+	for line in result.stderr.splitlines():
+		if not line.startswith("import time:") or "cumulative" in line:
+			continue
+		_, cumulative, name = line[len("import time:"):].split("|")
+		times[name.strip()] = int(cumulative)
+	return times
+
+
+def main():
+	parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--repeat", type = int, default = 5,     help = "number of fresh imports (default 5)")
+	parser.add_argument("--top",    type = int, default = 10,    help = "number of slowest modules listed (default 10)")
+	parser.add_argument("--module",             default = "exh", help = "module to import (default exh)")
+	args = parser.parse_args()
+
+	runs  = [import_times(args.module) for _ in range(args.repeat)]
+	total = sorted(run[args.module] for run in runs)
+
+	print("import {}: median {:.1f} ms, min {:.1f} ms ({} runs)".format(args.module, total[len(total) // 2] / 1000, total[0] / 1000, args.repeat))
+	print("IPython imported: {}".format("IPython" in runs[-1]))
+	print()
+	print("Slowest modules (cumulative, last run):")
+	for name, time in sorted(runs[-1].items(), key = lambda item: -item[1])[1:args.top + 1]:
+		print("  {:>8.1f} ms  {}".format(time / 1000, name))
+
+
+if __name__ == "__main__":
+	main()
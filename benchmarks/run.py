@@ -0,0 +1,224 @@
+"""
+Benchmarks of the hot paths of exhaustification: world generation, evaluation, computation of alternatives, maximal sets, IE and II.
+
+Every benchmark is timed over several runs ; its peak memory is measured with tracemalloc in a separate run.
+Results can be written to a JSON file and compared to a baseline obtained in the same way:
+
+	python run.py --output results.json                  # record a baseline
+	python run.py --baseline results.json                # compare to it ; exits with status 1 if a benchmark got slower
+
+baseline.json holds the reference results of the current tree (its metadata record the machine they were obtained on) ;
+timings depend on the machine: compare to results recorded on the same machine, and refresh baseline.json along with changes that affect performance.
+
+Usage: python run.py [-k SUBSTRING] [--repeat N] [--output FILE] [--baseline FILE] [--threshold RATIO]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+
+import exh
+import exh.alternatives  as alternatives
+import exh.options       as options
+import exh.model.options as model_options
+import exh.utils         as utils
+from exh            import *
+from exh.exts.gq    import Most, Mx
+from exh.exts.subdomain import Ec_x, dom_scale
+
+
+BENCHMARKS = []
+
+def benchmark(name, dom_quant = 3):
+	"""
+	Registers a benchmark: the decorated function sets up the workload and returns a function doing the work to be measured.
+	The size of default domains is set to "dom_quant" during setup and measurements.
+	"""
+	def decorator(setup):
+		BENCHMARKS.append((name, dom_quant, setup))
+		return setup
+	return decorator
+
+
+############################ WORKLOADS ##############################################
+
+def fresh_preds(k):
+	"""Returns k new predicates p1(x), ..., pk(x), so that no benchmark reuses the memoized results of another"""
+	return [Pred(name = "p{}".format(i + 1), depends = "x") for i in range(k)]
+
+def free_choice(k = 3, ii = False):
+	"""Exh Exh (Ex, p1(x) or ... or pk(x))"""
+	disjunction = Or(*fresh_preds(k))
+	return Exh(Exh(Ex > disjunction, scales = [], ii = ii), scales = [], ii = ii)
+
+def distributive(k = 3):
+	"""Ax, p1(x) or ... or pk(x)"""
+	return Ax > Or(*fresh_preds(k))
+
+
+@benchmark("assignment/n=16")
+def assignment_16():
+	return lambda: utils.getAssignment(16)
+
+@benchmark("assignment/n=20")
+def assignment_20():
+	return lambda: utils.getAssignment(20)
+
+for size in (4, 5, 6):
+	@benchmark("evaluate/distributive-alts/dom={}".format(size), dom_quant = size)
+	def evaluate_alts():
+		prejacent = distributive()
+		alts      = alternatives.alt(prejacent, scales = options.scales, subst = True)
+		return lambda: Universe(fs = [prejacent] + alts).evaluate(*alts, no_flattening = True)
+
+@benchmark("alt/distributive")
+def alt_distributive():
+	prejacent = distributive()
+	return lambda: alternatives.alt(prejacent, scales = options.scales, subst = True)
+
+@benchmark("alt_aux/free-choice")
+def alt_aux_free_choice():
+	prejacent = free_choice().prejacent
+	return lambda: alternatives.alt_aux(prejacent, options.scales, True)
+
+for size in (4, 5, 6):
+	@benchmark("maximal_sets/distributive/dom={}".format(size), dom_quant = size)
+	def maximal_sets():
+		prejacent = distributive()
+		alts      = alternatives.alt(prejacent, scales = options.scales, subst = True)
+		universe  = Universe(fs = [prejacent] + alts)
+		return lambda: alternatives.find_maximal_sets(universe.filter(prejacent), [~alt for alt in alts])
+
+@benchmark("exh/free-choice")
+def exh_free_choice():
+	return lambda: free_choice().e.innocently_excl
+
+@benchmark("exh/free-choice/ii")
+def exh_free_choice_ii():
+	return lambda: free_choice(ii = True).e.innocently_incl
+
+for size in (3, 4, 5, 6):
+	@benchmark("exh/distributive/dom={}".format(size), dom_quant = size)
+	def exh_distributive():
+		prejacent = distributive()
+		return lambda: Exh(prejacent, ii = True).e.innocently_incl
+
+for size in (4, 6):
+	@benchmark("exh/embedded/dom={}".format(size), dom_quant = size)
+	def exh_embedded():
+		# The embedded Exh has free variable x: it only reads the bits of p1(0), p2(0), p3(0) (cf exh.model.projection)
+		p1, p2, p3 = fresh_preds(3)
+		return lambda: Ax > Exh(p1 | p2 | p3, ii = True)
+
+@benchmark("exh/subdomain/ii", dom_quant = 4)
+def exh_subdomain():
+	d = Pred(name = "d", depends = "x")
+	return lambda: Exh(Ec_x > d, scales = dom_scale, ii = True).e.innocently_incl
+
+@benchmark("exh/gq/most-all-some", dom_quant = 4)
+def exh_gq():
+	p1, p2 = fresh_preds(2)
+	return lambda: Exh(Mx > p1 | p2, scales = [{Existential, Most, Universal}, {Or, And}], ii = True).e.innocently_incl
+
+
+############################ MEASUREMENTS ##############################################
+
+def measure(dom_quant, setup, repeat, min_time = 0.2, max_repeat = 100):
+	"""
+	Times at least "repeat" runs ; fast benchmarks are run until they have taken "min_time" seconds (or "max_repeat" runs), so that their minimum is reliable
+
+	Returns:
+		dict -- minimum and median time of the runs (in seconds), number of runs, peak memory allocated during one run (in bytes)
+	"""
+	old_dom_quant, old_exhaust_cache = model_options.dom_quant, options.exhaust_cache
+	model_options.dom_quant, options.exhaust_cache = dom_quant, False # every run must compute IE and II anew
+
+	try:
+		run   = setup()
+		times = []
+		while len(times) < repeat or (sum(times) < min_time and len(times) < max_repeat):
+			start = time.perf_counter()
+			run()
+			times.append(time.perf_counter() - start)
+
+		tracemalloc.start()
+		run()
+		_, peak = tracemalloc.get_traced_memory()
+		tracemalloc.stop()
+	finally:
+		model_options.dom_quant, options.exhaust_cache = old_dom_quant, old_exhaust_cache
+
+	return {"min": min(times), "median": statistics.median(times), "repeat": len(times), "peak_memory": peak}
+
+def compare(results, baseline, threshold):
+	"""
+	Prints the ratio of every result to its baseline
+
+	Returns:
+		list[str] -- the names of the benchmarks whose minimal time or peak memory exceeds "threshold" times the baseline's
+	"""
+	regressions = []
+	print()
+	print("{:<45} {:>10} {:>10}".format("Comparison to baseline", "time", "memory"))
+
+	for name, result in results.items():
+		if name not in baseline:
+			print("{:<45} {:>10} {:>10}".format(name, "new", "new"))
+			continue
+
+		time_ratio   = result["min"] / max(baseline[name]["min"], 1e-9) # the minimum is less sensitive to noise than the median
+		memory_ratio = result["peak_memory"] / max(baseline[name]["peak_memory"], 1)
+		regressed    = time_ratio > threshold or memory_ratio > threshold
+		if regressed:
+			regressions.append(name)
+
+		print("{:<45} {:>9.2f}x {:>9.2f}x{}".format(name, time_ratio, memory_ratio, "  <-- REGRESSION" if regressed else ""))
+
+	return regressions
+
+def metadata():
+	return {"python": platform.python_version(), "numpy": np.__version__, "exh": exh.__version__,
+	        "machine": platform.machine(), "platform": platform.platform()}
+
+
+def main():
+	parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("-k",          dest = "filter", default = "", help = "only run benchmarks whose name contains this substring")
+	parser.add_argument("--repeat",    type = int,   default = 5,   help = "minimal number of timed runs per benchmark (default 5)")
+	parser.add_argument("--output",                                 help = "JSON file to write the results to")
+	parser.add_argument("--baseline",                               help = "JSON file of results to compare to (e.g. the output of a previous run)")
+	parser.add_argument("--threshold", type = float, default = 1.25, help = "ratio to the baseline beyond which a benchmark has regressed (default 1.25)")
+	args = parser.parse_args()
+
+	results = dict()
+	print("{:<45} {:>10} {:>10} {:>12}".format("Benchmark", "min (ms)", "med (ms)", "peak (MiB)"))
+
+	for name, dom_quant, setup in BENCHMARKS:
+		if args.filter not in name:
+			continue
+
+		results[name] = measure(dom_quant, setup, args.repeat)
+		print("{:<45} {:>10.2f} {:>10.2f} {:>12.2f}".format(name, results[name]["min"] * 1000, results[name]["median"] * 1000, results[name]["peak_memory"] / 2 ** 20))
+
+	if args.output:
+		with open(args.output, "w") as f:
+			json.dump({"metadata": metadata(), "results": results}, f, indent = 2)
+
+	if args.baseline:
+		with open(args.baseline) as f:
+			baseline = json.load(f)["results"]
+
+		if compare(results, baseline, args.threshold):
+			sys.exit(1)
+
+
+if __name__ == "__main__":
+	main()
@@ -5,7 +5,20 @@ from .model   import *
 from .fol     import *
 from .exhaust import *
 from .scales  import *
+from .batch   import exhaust_many
 # from .worlds import *
 
+
+def __getattr__(name):
+	"""Imports the submodules that are not imported with exh (e.g. exh.sat, exh.exts) on first access"""
+	import importlib
+
+	try:
+		return importlib.import_module("." + name, __name__)
+	except ModuleNotFoundError as e:
+		if e.name != "{}.{}".format(__name__, name):
+			raise
+		raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name)) from None
+
 # Defining the names that are exported with from exh import *
 # __all__ = ["function1", "function2"]
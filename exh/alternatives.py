@@ -8,8 +8,10 @@ import copy
 
 from . import exhaust
 import exh.options  as options
-from exh.prop       import Pred, Or, And
-from exh.utils      import entails, remove_doubles
+from exh.model      import BDDUniverse, packed
+from exh.prop       import Pred, Or, And, hashcons
+from exh.utils      import remove_doubles
+from exh.stats      import Stats
 
 
 
@@ -19,40 +21,81 @@ from exh.utils      import entails, remove_doubles
 ############################ MAXIMAL SETS ##############################################
 
 
-def find_maximal_sets(universe, props, variables = None):
+def find_maximal_sets(universe, props, variables = None, stats = None):
 	"""
 	Given a set of worlds and a set of propositions, this method returns the maximal sets of propositions that are consistent with one another
 
 	Algorithm:
 	focus on the sets S of proposition which are all the propositions true in some world
 	return the maximal sets of S
+	Sets are packed as bits of uint64 words, so that duplicates are removed and inclusion is tested with vectorized bitwise operations (cf maximal_rows)
 
 	Arguments:
 		universe (Universe)
 		props    (list[Formula]) -- set of propositions to compute the maximal sets of
+		stats    (Stats)         -- if provided, records the time spent evaluating props ("evaluate") and comparing sets ("maximal_rows"), cf exh.stats
 
 	Returns:
 		np.array[bool]           -- returned_value[i, j] is True iff i-th maximal set contains j-th proposition
 
 	"""
 	kwargs       = {} if variables is None else {"variables" : variables}
-	truth_table  = universe.evaluate(*props, no_flattening = True, **kwargs)
-	maximal_sets = []
+	if stats is None:
+		stats = Stats(enabled = False)
 
-	# for every world,
-	for s in truth_table:
+	# BDD-backed universes find maximal sets without enumerating worlds
+	if isinstance(universe, BDDUniverse):
+		with stats.phase("maximal_sets"):
+			return universe.maximal_sets(props, **kwargs)
 
-		# test if the set of true proposition in that world is smaller than any of the current maximal sets
-		# if yes, go on to the next world
-		# if no, remove any smaller set from maximal set and insert
-		if any(entails(s, m) for m in maximal_sets):
-			continue
-		else:
-			maximal_sets = [m for m in maximal_sets if not entails(m, s)]
-			maximal_sets.append(s)
+	# the truth table is consumed chunk by chunk, so that memory stays bounded for universes that generate their worlds on the fly ;
+	# only the distinct sets of true propositions of every chunk are kept
+	sets = []
+	with stats.phase("evaluate"):
+		for truth_table in universe.evaluate_chunks(*props, no_flattening = True, **kwargs):
+			stats.peak("evaluate", truth_table.nbytes)
+			sets.append(packed.unique_rows(packed.pack(truth_table, axis = 1)))
 
-	return np.stack(maximal_sets) #if maximal_sets else np.full((0, 0), True, dtype = "bool")
+	if not sets:
+		return np.full((0, len(props)), False, dtype = "bool")
 
+	with stats.phase("maximal_rows"):
+		sets = packed.unique_rows(np.concatenate(sets, axis = 0))
+		stats.peak("maximal_rows", sets.nbytes)
+		return packed.unpack(maximal_rows(sets), len(props), axis = 1)
+
+
+def maximal_rows(sets, batch_size = 2 ** 22):
+	"""
+	Returns the rows of "sets" which are not strictly included in another row
+
+	Arguments:
+		sets       (np.ndarray[uint64]) -- array of shape (n_sets, n_words) of distinct sets, packed as bits
+		batch_size (int)                -- bound on the number of words compared at once (controls memory usage)
+
+	Algorithm:
+	A set can only be strictly included in a set with more elements. Sets are processed by decreasing cardinality ;
+	a set is maximal iff it is not included in one of the maximal sets of higher cardinality found so far.
+	"""
+	sizes   = packed.popcount(sets, axis = 1)
+	maximal = np.empty((0, sets.shape[1]), dtype = sets.dtype)
+
+	for size in np.unique(sizes)[::-1]:
+		candidates = sets[sizes == size]
+		keep       = np.full(len(candidates), True)
+		step       = max(1, batch_size // max(1, maximal.size))
+		complement = np.invert(maximal)
+
+		# candidate c is included in m iff c & ~m is empty
+		for start in range(0, len(candidates) if len(maximal) else 0, step):
+			batch    = candidates[start:start + step]
+			included = np.all((batch[:, np.newaxis, :] & complement[np.newaxis, :, :]) == 0, axis = 2)
+			keep[start:start + step] = ~np.any(included, axis = 1)
+
+		# distinct sets of the same cardinality are never included in one another
+		maximal = np.concatenate([maximal, candidates[keep]], axis = 0)
+
+	return maximal
 
 
 
@@ -94,7 +137,7 @@ def alt_aux(p, scales, subst):
 		
 		exh_alternatives = [p]
 		exh_alternatives.extend(
-			[exhaust.Exh(alt, alts = all_alternatives[:i] + all_alternatives[i + 1:]) 
+			[exhaust.Exh(alt, alts = all_alternatives[:i] + all_alternatives[i + 1:], **p.e.settings) 
 		                    for i, alt in enumerate(all_alternatives) if i != 0 # <--- trick: we don't recompute exhaustification of the prejacent
 			]
 		) 
@@ -154,8 +197,9 @@ def alt(p, scales = [], subst = False):
 
 	1) Simplify trivial alternatives: A or A -> A, B and B -> B
 	2) Remove duplicate alternatives: {A, B, B, A or B} -> {A, B, A or B}
+	3) Make identical subformulas of the alternatives the same objects (cf prop.hashcons)
 	"""
-	return remove_doubles(simplify_alts(alt_aux(p, scales, subst)))
+	return remove_doubles(map(hashcons, simplify_alts(alt_aux(p, scales, subst))))
 	# return alt_aux(p, scales, subst)
 
 
@@ -0,0 +1,63 @@
+"""
+Exhaustification of many prejacents in parallel, with a pool of processes.
+"""
+import os
+import types
+
+import exh.options       as options
+import exh.model.options as model_options
+from exh.prop     import Pred
+from exh.exhaust  import Exh
+
+
+def snapshot():
+	"""Returns the state that worker processes must share with the main process: options and the index of the next predicate"""
+	# Options are the lower-case variables of the options modules (other names are imported classes)
+	def variables(module):
+		return {name: value for name, value in vars(module).items()
+		        if name.islower() and not name.startswith("_") and not isinstance(value, types.ModuleType)}
+
+	return {"options": variables(options), "model_options": variables(model_options), "last_index": Pred.last_index}
+
+def initialize_worker(state):
+	"""Restores the state of the main process in a worker process (cf snapshot)"""
+	for name, value in state["options"].items():
+		setattr(options, name, value)
+	for name, value in state["model_options"].items():
+		setattr(model_options, name, value)
+	Pred.last_index = max(Pred.last_index, state["last_index"])
+
+def exhaust_one(prejacent, kwargs):
+	return Exh(prejacent, **kwargs)
+
+
+def exhaust_many(prejacents, max_workers = None, chunksize = 1, **kwargs):
+	"""
+	Exhaustifies every prejacent in "prejacents", in parallel
+
+	Arguments:
+		prejacents  (list[Formula]) -- the formulas to exhaustify
+		max_workers (int)           -- number of processes (default: number of CPUs) ; with 1, prejacents are exhaustified in the current process
+		chunksize   (int)           -- number of prejacents sent to a process at once
+		kwargs                      -- keyword arguments of Exh (e.g. "alts", "scales", "ii", "universe")
+
+	Returns:
+		list[Exh] -- the Exh objects for every prejacent, in the same order as "prejacents" ; their IE and II sets are in attributes "ieSet" and "iiSet"
+	"""
+	prejacents = list(prejacents)
+
+	if max_workers is None:
+		max_workers = os.cpu_count() or 1
+
+	if max_workers == 1 or len(prejacents) <= 1:
+		return [exhaust_one(prejacent, kwargs) for prejacent in prejacents]
+
+	# Imported here: concurrent.futures.process takes longer to import than the rest of exh
+	from concurrent.futures import ProcessPoolExecutor
+
+	with ProcessPoolExecutor(max_workers = max_workers, initializer = initialize_worker, initargs = (snapshot(),)) as executor:
+		results = list(executor.map(exhaust_one, prejacents, [kwargs] * len(prejacents), chunksize = chunksize))
+
+	# Predicates created in workers must not share indices with predicates created later on in this process
+	Pred.last_index = max([Pred.last_index] + [idx + 1 for result in results for idx in result.e.vm.preds])
+	return results
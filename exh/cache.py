@@ -0,0 +1,157 @@
+"""
+Memoization of the results of exhaustification.
+Recursive exhaustification (e.g. Exh(Exh(a | b))) builds an Exh for every alternative, and many of them are identical ;
+results of innocent exclusion and inclusion are stored here so that they are computed only once.
+If options.cache_dir is set, results are also stored on disk (cf DiskCache), and reused across processes and sessions.
+"""
+import hashlib
+import io
+import os
+import sqlite3
+from collections import OrderedDict
+
+import numpy as np
+
+import exh.options       as options
+import exh.model.options as model_options
+
+
+class ExhaustCache:
+	"""
+	Least-recently-used store of the results of Exhaust.innocently_excludable and Exhaust.innocently_includable.
+	Entries are identified by the structural keys of the prejacent and of the alternatives (in order), the variables, the domain size and the computation settings.
+
+	Attributes:
+		max_entries (int)         -- maximal number of entries
+		entries     (OrderedDict) -- maps (key, kind) pairs to results, from least to most recently used ; kind is "excl" or "incl"
+		hits, misses (int)        -- number of lookups that found (resp. did not find) an entry
+		disk_hits    (int)        -- number of lookups that found an entry on disk (cf DiskCache), after not finding it in memory
+		disks        (dict)       -- maps cache directories to their DiskCache
+	"""
+
+	def __init__(self, max_entries = 2 ** 12):
+		self.max_entries = max_entries
+		self.entries     = OrderedDict()
+		self.hits        = 0
+		self.misses      = 0
+		self.disk_hits   = 0
+		self.disks       = dict()
+
+	def __len__(self):
+		return len(self.entries)
+
+	def clear(self):
+		self.entries.clear()
+
+	@staticmethod
+	def key(e):
+		"""Returns the key of the computations of Exhaust object e"""
+		return (e.p.key, tuple(alt.key for alt in e.alts), e.vm.signature, tuple(sorted(e.dummy_vals.items())), model_options.dom_quant,
+		        e.settings["universe"], e.engine)
+
+	def disk(self):
+		"""Returns the DiskCache of directory options.cache_dir, or None if it is not set"""
+		if options.cache_dir is None:
+			return None
+		if options.cache_dir not in self.disks:
+			self.disks[options.cache_dir] = DiskCache(options.cache_dir)
+		return self.disks[options.cache_dir]
+
+	def get(self, key, kind):
+		"""Returns the results stored for key and kind ("excl" or "incl"), or None if there are none"""
+		try:
+			value = self.entries[key, kind]
+		except KeyError:
+			disk  = self.disk()
+			value = disk.get(key, kind) if disk is not None else None
+
+			if value is None:
+				self.misses += 1
+				return None
+
+			self.disk_hits += 1
+			self.put(key, kind, value, persist = False)
+			return value
+
+		self.hits += 1
+		self.entries.move_to_end((key, kind))
+		return value
+
+	def put(self, key, kind, value, persist = True):
+		"""Stores "value" for key and kind in memory, and on disk if options.cache_dir is set and "persist" is True"""
+		if persist and self.disk() is not None:
+			self.disk().put(key, kind, value)
+
+		# Results are shared by every Exhaust object with the same key: they must not be modified
+		for array in value:
+			if hasattr(array, "flags"):
+				array.flags.writeable = False
+
+		self.entries[key, kind] = value
+		self.entries.move_to_end((key, kind))
+
+		while len(self.entries) > self.max_entries:
+			self.entries.popitem(last = False)
+
+
+class DiskCache:
+	"""
+	Persistent store of the results of Exhaust.innocently_excludable and Exhaust.innocently_includable, in an SQLite database.
+	Entries are identified by a hash of the key of ExhaustCache (cf digest) ; results are stored as .npz archives.
+	The database can be shared by several processes.
+
+	Attributes:
+		path (str) -- the database file (results.sqlite in the cache directory)
+	"""
+
+	# Incremented whenever the keys or the stored results change meaning, so that older entries are ignored
+	version = 2
+
+	def __init__(self, directory):
+		os.makedirs(directory, exist_ok = True)
+		self.path       = os.path.join(directory, "results.sqlite")
+		self.connection = sqlite3.connect(self.path, timeout = 60, check_same_thread = False)
+		self.connection.execute("CREATE TABLE IF NOT EXISTS results (key TEXT, kind TEXT, value BLOB, PRIMARY KEY (key, kind))")
+		self.connection.commit()
+
+	@staticmethod
+	def digest(key):
+		"""Returns a hash of "key" which, unlike Python's hash, is the same in every process"""
+		def canonical(x):
+			if isinstance(x, tuple):
+				return tuple(canonical(y) for y in x)
+			if isinstance(x, type): # e.g. the class of universe
+				return "{}.{}".format(x.__module__, x.__qualname__)
+			if isinstance(x, np.generic):
+				return x.item()
+			return x
+
+		return hashlib.sha256(repr((DiskCache.version, canonical(key))).encode("utf-8")).hexdigest()
+
+	def get(self, key, kind):
+		"""Returns the results stored for key and kind ("excl" or "incl"), or None if there are none"""
+		row = self.connection.execute("SELECT value FROM results WHERE key = ? AND kind = ?", (self.digest(key), kind)).fetchone()
+		if row is None:
+			return None
+
+		with np.load(io.BytesIO(row[0]), allow_pickle = False) as archive:
+			return tuple(archive["arr_{}".format(i)] for i in range(len(archive.files)))
+
+	def put(self, key, kind, value):
+		# Results (maximal sets and masks) are boolean arrays, or empty lists when there are no maximal sets
+		buffer = io.BytesIO()
+		np.savez(buffer, *[np.asarray(array, dtype = "bool") for array in value])
+
+		with self.connection:
+			self.connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?)", (self.digest(key), kind, buffer.getvalue()))
+
+	def clear(self):
+		with self.connection:
+			self.connection.execute("DELETE FROM results")
+
+	def __len__(self):
+		return self.connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+# Cache used by Exhaust objects
+results = ExhaustCache()
@@ -5,6 +5,11 @@ import exh.alternatives as alternatives
 import exh.model        as model
 import exh.prop         as prop
 import exh.scales       as scale
+import exh.sat          as sat
+import exh.cache        as cache
+import exh.stats        as stats
+
+from exh.model import projection
 
 from exh.utils import jprint
 import exh.options as options
@@ -22,11 +27,16 @@ class Exhaust:
 		incl (bool)            -- whether IE exhaustification has been computed yet
 		incl (bool)            -- whether II exhaustification has been computed yet
 		vm   (VariableManager) -- variable manager for prejacent & alternatives
-		u    (Universe)        -- universe with all corresponding logical possibilities
+		u    (Universe)        -- universe with all corresponding logical possibilities (only constructed when needed)
+		engine   (str)         -- how maximal sets are computed: "universe" (by enumerating the worlds of u) or "sat" (with a SAT solver, cf exh.sat) ;
+		                          "sat" only pays off when vm has many bits, and is much slower than "universe" for many alternatives over few bits (cf options.engine)
+		settings (dict)        -- computation settings ("universe", "engine", "dedup"), passed on to the Exh objects created when computing alternatives
+		equivalent_alts (list[list[Formula]]) -- equivalent_alts[i] lists the alternatives removed because they are equivalent to the i-th alternative (cf remove_equivalent_alts)
+		stats    (stats.Stats) -- time spent in every phase of the computation and counters, recorded if options.profile is True (cf exh.stats)
 	"""
 	
 	
-	def __init__(self, prejacent, alts = None, scales = None, subst = None, extra_alts = []):
+	def __init__(self, prejacent, alts = None, scales = None, subst = None, extra_alts = [], universe = None, engine = None, dedup = None):
 		"""
 		Arguments
 			- prejacent (Formula)       -- the prejacent
@@ -34,7 +44,12 @@ class Exhaust:
 			- scales                    -- the scales used to compute automatic alternatives
 			- subst     (bool)          -- whether subconstituent alternatives should be used
 			- extra_alts(list[Formula]) -- if alternatives are computed automatically, add to the already computed alternatives some stipulated ones.
+			- universe                  -- the class of Universe to compute IE and II with (e.g. model.PackedUniverse) ; defaults to options.universe
+			- engine    (str)           -- "universe" or "sat" (only for many bits, cf options.engine) ; defaults to options.engine
+			- dedup     (bool)          -- whether to keep only one alternative per class of equivalent alternatives ; defaults to options.dedup
 		"""
+		self.stats = stats.Stats(enabled = options.profile)
+
 		# Defining default options dynamically so that users can change options on the fly
 		if scales is None:
 			scales = options.scales
@@ -45,11 +60,27 @@ class Exhaust:
 		if subst is None:
 			subst = options.sub
 
+		if universe is None:
+			universe = options.universe
+
+		if engine is None:
+			engine = options.engine
+		if engine not in ("universe", "sat"):
+			raise ValueError("Unknown engine {} ; use \"universe\" or \"sat\"".format(engine))
+
+		self.engine   = engine
+		if dedup is None:
+			dedup = options.dedup
+
+		self.settings = {"universe": universe, "engine": engine, "dedup": dedup}
+
 		if alts is None: # if no alternative is given, compute them automatically
-			self.alts = alternatives.alt(prejacent, scales = scales, subst = subst)
+			with self.stats.phase("alternatives"):
+				self.alts = alternatives.alt(prejacent, scales = scales, subst = subst)
 		else:
 			self.alts = alts
 		self.alts += extra_alts
+		self.stats.count("alternatives", len(self.alts))
 
 		self.p = prejacent
 
@@ -63,59 +94,233 @@ class Exhaust:
 		self.incl = False
 		self.excl = False
 
-		self.vm = model.VarManager.merge(prejacent.vm, *(alt.vm for alt in self.alts))
-		self.u  = model.Universe(vm = self.vm)
+		with self.stats.phase("merge"):
+			self.vm = model.VarManager.merge(prejacent.vm, *(alt.vm for alt in self.alts))
+		self._u = None
+		self._supports = dict() # maps the keys (or VarManagers) of formulas to the bits they read (cf support)
+
+		self.equivalent_alts = [[] for _ in self.alts]
+		if dedup:
+			with self.stats.phase("dedup"):
+				self.remove_equivalent_alts()
+			self.stats.count("alternatives (dedup)", len(self.alts))
+
+	def __getstate__(self):
+		# The universe is not pickled ; it is recomputed if needed
+		state = self.__dict__.copy()
+		state["_u"] = None
+		state["_supports"] = dict()
+		del state["vm"]
+		return state
+
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self.vm = model.VarManager.merge(self.p.vm, *(alt.vm for alt in self.alts))
 
+	@property
+	def u(self):
+		# The universe is constructed lazily, as the SAT engine does not need it
+		if self._u is None:
+			self._u = self.universe(self.relevant_bits())
+		return self._u
+
+	def universe(self, bits = None):
+		"""Returns a universe of the class given in settings, enumerating the truth-values of bits "bits" (default: all bits of vm)"""
+		universe = self.settings["universe"]
+
+		# Some universes (e.g. model.SymmetricUniverse) cannot deal with every formula ; we fall back on a complete universe
+		if not universe.supports(self.p, *self.alts):
+			universe = model.Universe
+
+		with self.stats.phase("universe"):
+			u = universe(vm = self.vm, bits = bits)
+		self.stats.count("worlds", u.n_worlds)
+		return u
+
+	def support(self, f):
+		"""
+		Returns the bits read by formula f with the dummy values of free variables (cf Formula.bits), 
+		or None if f has other free variables (all the values of the bits of these variables are then read)
+		"""
+		# Without free variables, formulas (almost) always read every bit of their predicates: the bits of the predicates, which only depend on f.vm, are used instead
+		if not self.dummy_vals:
+			key = f.vm
+		elif set(f.free_vars) <= set(self.dummy_vals):
+			key = f.key
+		else:
+			return None
 
-	def innocently_excludable(self):
+		if key not in self._supports:
+			with self.stats.phase("projection"):
+				self._supports[key] = f.bits(self.vm, self.dummy_vals) if self.dummy_vals else projection.predicate_bits(f, self.vm)
+		return self._supports[key]
 
-		evalSet = [~f for f in self.alts]
-		worldsPrejacent = np.squeeze(self.u.evaluate(self.p, no_flattening = True, 
-		                                                     variables = self.dummy_vals), # give free variables dummy values
-		                             axis = 1) 
-		# We restrict ourselves to the worlds where the prejacent is True
-		uPrejacent = self.u.restrict(worldsPrejacent)
+	def relevant_bits(self):
+		"""Returns the bits read by the prejacent or some alternative (cf projection.relevant_bits), or None if they are all read or options.project is False"""
+		# Without free variables, the prejacent and the alternatives read all the bits of their predicates, i.e. of vm (cf support)
+		if not options.project or not self.dummy_vals:
+			return None
+
+		supports = [self.support(f) for f in [self.p] + self.alts]
+		if any(bits is None for bits in supports):
+			return None
+
+		bits = sorted(set().union(*supports))
+		return bits if len(bits) < self.vm.n else None
+
+	def remove_equivalent_alts(self):
+		"""
+		Keeps only the first alternative of every class of logically equivalent alternatives ; the others are stored in "equivalent_alts".
+		Equivalent alternatives are either all excludable (resp. includable) or none is: removing them does not change the result of exhaustification, but makes it faster.
+		"""
+		# The SAT engine does not enumerate worlds: alternatives are grouped under the first alternative they are equivalent to (cf sat.entailment_matrix)
+		if self.engine == "universe":
+			fingerprints = self.u.fingerprints(*self.alts, variables = self.dummy_vals)
+		else:
+			with self.stats.phase("entailment"):
+				entails = sat.entailment_matrix(self.alts, self.vm, variables = self.dummy_vals)
+			fingerprints = np.argmax(entails & entails.T, axis = 1)
+
+		classes = dict()
+		for alt, fingerprint in zip(self.alts, fingerprints):
+			classes.setdefault(fingerprint, []).append(alt)
+
+		self.alts            = [equivalents[0]  for equivalents in classes.values()]
+		self.equivalent_alts = [equivalents[1:] for equivalents in classes.values()]
+
+	def entailment_matrix(self):
+		"""
+		Returns the entailment relation between the alternatives, as a boolean matrix: returned_value[i, j] is True iff the i-th alternative entails the j-th.
+		With the universe engine, alternatives are evaluated once (cf Universe.entailment_matrix), rather than once per pair ; with the SAT engine, they are encoded once (cf sat.entailment_matrix).
+		"""
+		with self.stats.phase("entailment"):
+			if self.engine == "universe":
+				return self.u.entailment_matrix(*self.alts, variables = self.dummy_vals)
+			return sat.entailment_matrix(self.alts, self.vm, variables = self.dummy_vals)
+
+	def equivalence_matrix(self):
+		"""Returns the equivalence relation between the alternatives, as a boolean matrix (cf entailment_matrix)"""
+		entails = self.entailment_matrix()
+		return entails & entails.T
+
+	def maximal_sets(self, constraints, props):
+		"""
+		Returns the maximal sets of propositions "props" consistent with one another and with "constraints" (cf alternatives.find_maximal_sets),
+		or None if there are no propositions or the constraints are inconsistent
+		"""
+		if not props:
+			return None
+
+		if self.engine == "sat":
+			with self.stats.phase("sat"):
+				maximal_sets = sat.find_maximal_sets(constraints, props, self.vm, variables = self.dummy_vals)
+			return maximal_sets if len(maximal_sets) else None
+		else:
+			supports = [self.support(f) for f in list(constraints) + list(props)] if options.project else [None]
+			groups   = projection.independent_groups(supports) if all(bits is not None for bits in supports) else []
+			if len(groups) > 1:
+				return self.factored_maximal_sets(constraints, props, groups)
+
+			universe = self.u
+			with self.stats.phase("filter"):
+				universe = universe.filter(*constraints, variables = self.dummy_vals) # give free variables dummy values
+			return alternatives.find_maximal_sets(universe, props, variables = self.dummy_vals, stats = self.stats) if universe.n_worlds != 0 else None
+
+	def factored_maximal_sets(self, constraints, props, groups):
+		"""
+		Same as maximal_sets, when constraints and props split into groups of formulas reading disjoint bits (cf projection.independent_groups).
+		Worlds are then the combinations of worlds of every group: maximal sets are the combinations of the maximal sets of every group,
+		which are computed in universes enumerating the bits of the group only.
+		"""
+		factors = [] # for every group with propositions, the indices of these propositions and their maximal sets
 
-		if evalSet and uPrejacent.n_worlds != 0:
-			self.maximalExclSets         = alternatives.find_maximal_sets(uPrejacent, evalSet, variables = self.dummy_vals)
-			self.innocently_excl_indices = np.prod(self.maximalExclSets, axis = 0, dtype = "bool") # innocently_excl_indices[i] is true iff the i-th proposition belongs to every maximal set
+		for indices, bits in groups:
+			group_constraints = [constraints[i] for i in indices if i < len(constraints)]
+			group_props       = [i - len(constraints) for i in indices if i >= len(constraints)]
+
+			universe = self.universe(bits)
+			if group_constraints:
+				with self.stats.phase("filter"):
+					universe = universe.filter(*group_constraints, variables = self.dummy_vals)
+			if universe.n_worlds == 0:
+				return None
+
+			if group_props:
+				sets = alternatives.find_maximal_sets(universe, [props[i] for i in group_props], variables = self.dummy_vals, stats = self.stats)
+				factors.append((group_props, np.asarray(sets, dtype = "bool")))
+
+		# One maximal set per choice of a maximal set in every group
+		choices      = np.indices([len(sets) for _, sets in factors]).reshape(len(factors), -1)
+		maximal_sets = np.full((choices.shape[1], len(props)), False, dtype = "bool")
+		for (group_props, sets), choice in zip(factors, choices):
+			maximal_sets[:, group_props] = sets[choice]
+
+		return maximal_sets
+
+
+	def cached(self, kind, compute):
+		"""Returns the results of "compute" (a function), which are looked up in (and stored into) cache.results if options.exhaust_cache is True"""
+		if not options.exhaust_cache:
+			return compute()
+
+		key    = cache.results.key(self)
+		result = cache.results.get(key, kind)
+
+		if result is None:
+			result = compute()
+			cache.results.put(key, kind, result)
 		else:
-			self.maximalExclSets         = []
-			self.innocently_excl_indices = []
+			self.stats.count("cache hits")
+
+		return result
 
+	def innocently_excludable(self):
+		with self.stats.phase("excl"):
+			self.maximalExclSets, self.innocently_excl_indices = self.cached("excl", self.compute_innocently_excludable)
+		self.stats.count("maximal sets (excl)", len(self.maximalExclSets))
 		self.excl = True
 		return self.innocently_excl_indices
 
+	def compute_innocently_excludable(self):
+		"""Returns the maximal sets of excludable alternatives and the mask of innocently excludable alternatives"""
+
+		evalSet = [~f for f in self.alts]
+		# We restrict ourselves to the worlds where the prejacent is True
+		maximalSets = self.maximal_sets([self.p], evalSet)
+
+		if maximalSets is not None:
+			return maximalSets, np.prod(maximalSets, axis = 0, dtype = "bool") # innocently_excl_indices[i] is true iff the i-th proposition belongs to every maximal set
+		else:
+			return [], []
+
 	def innocently_includable(self):
 
 		if not self.excl:
 			raise ValueError("Exclusion has not been applied yet.")
 
+		with self.stats.phase("incl"):
+			self.maximalInclSets, self.innocently_incl_indices = self.cached("incl", self.compute_innocently_includable)
+		self.stats.count("maximal sets (incl)", len(self.maximalInclSets))
+		self.incl = True
+		return self.innocently_incl_indices
+
+	def compute_innocently_includable(self):
+		"""Returns the maximal sets of includable alternatives and the mask of innocently includable alternatives"""
+
 		evalNegSet = [~f for f, excludable in zip(self.alts, self.innocently_excl_indices) if excludable] + [self.p]
 		evalPosSet = [ f for f, excludable in zip(self.alts, self.innocently_excl_indices) if not excludable]
 
-		worldsStengthenedPrejacent = np.prod(self.u.evaluate(*evalNegSet, no_flattening = True,
-		                                                                  variables = self.dummy_vals),
-		                                     axis = 1, 
-		                                     dtype = "bool")
-
 		# Restricting ourselves to the worlds where the prejacent is true and the negatable alternatives are false.
-		uSPrejacent = self.u.restrict(worldsStengthenedPrejacent)
+		maximalSets = self.maximal_sets(evalNegSet, evalPosSet)
 		
-		if evalPosSet  and uSPrejacent.n_worlds != 0:
-			maximalSets = alternatives.find_maximal_sets(uSPrejacent, evalPosSet, variables = self.dummy_vals)
-
+		if maximalSets is not None:
 			# The maximal sets refer to positions in the set of non-excludable alternatives ; we must convert this to position in the whole set of alternatives
-			self.maximalInclSets = np.full((len(maximalSets), len(self.alts)), False, dtype = "bool")
-			self.maximalInclSets[:, np.logical_not(self.innocently_excl_indices)] = maximalSets
+			maximalInclSets = np.full((len(maximalSets), len(self.alts)), False, dtype = "bool")
+			maximalInclSets[:, np.logical_not(self.innocently_excl_indices)] = maximalSets
 
-			self.innocently_incl_indices = np.prod(self.maximalInclSets, axis = 0, dtype = "bool")
+			return maximalInclSets, np.prod(maximalInclSets, axis = 0, dtype = "bool")
 		else:
-			self.maximalInclSets         = []
-			self.innocently_incl_indices = []
-
-		self.incl = True
-		return self.innocently_incl_indices
+			return [], []
 
 	def diagnose(self, display = jprint):
 		"""Diplay pertinent information regarding the results of the computation such as maximal sets, IE alternatives, II alternatives"""
@@ -133,6 +338,13 @@ class Exhaust:
 			else:
 				return "nothing"
 
+		if any(self.equivalent_alts):
+			display("Equivalent alternatives (removed):")
+			for alt, equivalents in zip(self.alts, self.equivalent_alts):
+				if equivalents:
+					display(str(alt) + " \u2261 " + inline_sep.join(map(str, equivalents)))
+			display()
+
 		if self.excl:
 			display("Maximal Sets (excl):")
 			for excl in self.maximalExclSets:
@@ -165,6 +377,7 @@ class Exhaust:
 class Exh(prop.Operator):
 	"""
 	This class wraps the class Exhaust into a Formula object, so that it can be evaluated like any Formula object
+	Keyword arguments not listed below are passed on to Exhaust (e.g. "universe")
 
 	Attributes:
 		e (Exhaust) -- the object Exhaust that performs the actual computation
@@ -175,8 +388,8 @@ class Exh(prop.Operator):
 
 	substitutable = False
 	
-	def __init__(self, child, alts = None, scales = None, subst = None, ii = None, extra_alts = []):
-		self.e = Exhaust(child, alts, scales, subst, extra_alts)
+	def __init__(self, child, alts = None, scales = None, subst = None, ii = None, extra_alts = [], **kwargs):
+		self.e = Exhaust(child, alts, scales, subst, extra_alts, **kwargs)
 		super(Exh, self).__init__(None, child)
 
 		if ii is None:
@@ -196,15 +409,19 @@ class Exh(prop.Operator):
 		
 
 		self.evalSet = [~f for f, excludable in zip(self.alts, self.ieSet) if excludable] + [f for f, includable in zip(self.alts, self.iiSet) if includable]
+		self._key    = None
+
 
 
+	def dependencies(self, variables, free_vars):
+		return [(f, variables, free_vars) for f in [self.children[0]] + self.evalSet]
 
-	def evaluate_aux(self, assignment, vm, variables = dict(), free_vars = list()):
+	def combine(self, values, variables, free_vars):
+		return prop.fold(np.bitwise_and, values)
 
+	def symbolic_aux(self, algebra, vm, variables):
 		evaluanda = [self.children[0]] + self.evalSet
-		values = [f.evaluate_aux(assignment, vm, variables) for f in evaluanda]
-	
-		return np.min(np.stack(values), axis = 0)
+		return algebra.conj([f.symbolic_aux(algebra, vm, variables) for f in evaluanda])
 
 	def unpack(self):
 		return self.prejacent & prop.And(*self.evalSet)
@@ -212,6 +429,10 @@ class Exh(prop.Operator):
 	@property
 	def alts(self):
 		return self.e.alts
+
+	@property
+	def stats(self):
+		return self.e.stats
 	
 
 	def vars(self):
@@ -221,8 +442,17 @@ class Exh(prop.Operator):
 	def diagnose(self, *args, **kwargs):
 		self.e.diagnose(*args, **kwargs)
 
-	def __eq__(self, other):
-		return isinstance(other, Exh) and (self.children[0] == other.children[0])
+	@property
+	def eq_key(self):
+		# Two Exh are equal if their prejacents are, regardless of alternatives (cf Formula.__eq__), so that formulas stay equal to their alternatives with default alternatives for Exh
+		return prop.Key((self.__class__.__name__, self.children[0].eq_key))
+
+	def symmetric_aux(self):
+		return all(f.symmetric_aux() for f in [self.children[0]] + self.alts)
+
+	def key_aux(self):
+		# Unlike equality (cf eq_key), the key takes alternatives into account, as well as the alternatives actually negated or asserted (which depend on "ii"): caches of truth-values and of results rely on it
+		return (self.__class__.__name__, self.children[0].key, tuple(alt.key for alt in self.alts), tuple(f.key for f in self.evalSet))
 
 	@property
 	def prejacent(self):
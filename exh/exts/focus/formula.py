@@ -4,7 +4,7 @@ import exh.model          as var
 import exh.utils          as utils
 import exh.model.options  as options
 
-from exh.prop.formula import Formula
+from exh.prop.formula import Formula, Key
 
 
 ############### PREDICATE CLASS ################
@@ -18,6 +18,7 @@ class Focus(Formula):
 
 	no_parenthesis = True
 	substitutable  = False
+	memoize        = False
 
 	def __init__(self, child, alts):
 		self.alts = alts
@@ -25,19 +26,29 @@ class Focus(Formula):
 
 
 
-	# @profile
-	def evaluate_aux(self, assignment, vm, variables = dict(), free_vars = list()):
-		# Not necessary to split by "free_vars", the empty case is just a special case
-		# The split avoids generalizing to the worst case.
-		return self.children[0].evaluate_aux(assignment, vm, variables, free_vars)
+	def dependencies(self, variables, free_vars):
+		return [(self.children[0], variables, free_vars)]
 
+	def combine(self, values, variables, free_vars):
+		value, = values
+		return value
 
+	def symbolic_aux(self, algebra, vm, variables):
+		return self.children[0].symbolic_aux(algebra, vm, variables)
 
 
 
 
-	def __eq__(self, other):
-		return super(Focus, self).__eq__(other) and self.children[0] == other.children[0]
+
+
+	@property
+	def eq_key(self):
+		# Focused items are equal if their children are, regardless of alternatives (cf Exh.eq_key)
+		return Key((self.__class__.__name__, self.children[0].eq_key))
+
+	def key_aux(self):
+		# Unlike equality, the key takes alternatives into account
+		return (self.__class__.__name__, self.children[0].key, tuple(alt.key for alt in self.alts))
 
 
 	def display_aux(self, latex):
@@ -56,6 +67,5 @@ class Focus(Formula):
 	def vars(self):
 		"""Returns a VariableManager object for all the variables that occur in the formula"""
 
-		self.vm = var.VarManager.merge(self.children[0].vars(), *(alt.vars() for alt in self.alts))
-		self.vm.linearize()
+		self.vm = var.VarManager.merge(self.children[0].vm, *(alt.vm for alt in self.alts))
 		return self.vm
\ No newline at end of file
@@ -22,17 +22,30 @@ class Most(q.Quantifier):
 	def fun(self, results):
 		return np.mean(results, axis = 0) > 0.5
 
+	def symbolic_fun(self, algebra, results):
+		return algebra.at_least(results, len(results) // 2 + 1)
+
 
 
 
 class NumeralQuantifier(q.Quantifier):
 
+	def key_aux(self):
+		return super(NumeralQuantifier, self).key_aux() + (self.n,)
+
 	def fun(self, results):
 		return self.numerosity(np.sum(results, axis = 0))
 
 	def numerosity(self, counts):
 		raise Exception("Abstract class NumeralQuantifier can't be instantiated")
 
+	def symbolic_fun(self, algebra, results):
+		return self.symbolic_numerosity(algebra, lambda k: algebra.at_least(results, k))
+
+	def symbolic_numerosity(self, algebra, at_least):
+		"""Counterpart of "numerosity" for symbolic compilation ; "at_least(k)" is the node true iff the count is at least k"""
+		raise Exception("Abstract class NumeralQuantifier can't be instantiated")
+
 
 class ExactlyQuantifier(NumeralQuantifier):
 	plain_symbol = "Exactly "
@@ -48,6 +61,9 @@ class ExactlyQuantifier(NumeralQuantifier):
 	def numerosity(self, counts):
 		return counts == self.n
 
+	def symbolic_numerosity(self, algebra, at_least):
+		return algebra.conj([at_least(self.n), algebra.neg(at_least(self.n + 1))])
+
 
 class MoreThanQuantifier(NumeralQuantifier):
 	plain_symbol = "More than "
@@ -63,6 +79,9 @@ class MoreThanQuantifier(NumeralQuantifier):
 	def numerosity(self, counts):
 		return counts > self.n
 
+	def symbolic_numerosity(self, algebra, at_least):
+		return at_least(self.n + 1)
+
 class LessThanQuantifier(NumeralQuantifier):
 	plain_symbol = "Less than "
 	latex_symbol = "\\text{{Less than }}"
@@ -77,6 +96,9 @@ class LessThanQuantifier(NumeralQuantifier):
 	def numerosity(self, counts):
 		return counts < self.n
 
+	def symbolic_numerosity(self, algebra, at_least):
+		return algebra.neg(at_least(self.n))
+
 
 M = q.quantifier_cons(Most)
 
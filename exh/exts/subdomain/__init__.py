@@ -8,6 +8,7 @@ import exh.utils  as utils
 class SubdomainExistential(q.Quantifier):
 	"""docstring for SubdomainExistential"""
 	verbose = True
+	bitwise = True
 	plain_symbol = "\u2203c"
 	latex_symbol = r"\exists_C"
 
@@ -22,12 +23,16 @@ class SubdomainExistential(q.Quantifier):
 			self.latex_symbol = "\u2203_{{{}}}".format("".join(r"\circ" if bit else "." for bit in self.mask))
 
 	def fun(self, results):
-		return np.max(results[self.mask], axis = 0)
+		return np.bitwise_or.reduce(results[self.mask], axis = 0)
 
-	def __eq__(self, other):
-		if self.__class__ is other.__class__:
-			return self.qvar == other.qvar and np.all(self.mask == other.mask) and self.children[0] == other.children[0] 
-		return False
+	def symbolic_fun(self, algebra, results):
+		return algebra.disj([result for result, bit in zip(results, self.mask) if bit])
+
+	def symmetric_aux(self):
+		return bool(np.all(self.mask)) and super(SubdomainExistential, self).symmetric_aux()
+
+	def key_aux(self):
+		return super(SubdomainExistential, self).key_aux() + (tuple(bool(bit) for bit in self.mask),)
 
 	def lower_alternatives(self):
 		n_true_mask = np.sum(self.mask)
@@ -3,12 +3,16 @@ from collections import defaultdict
 
 from exh.model import vars as var
 from exh.model import options
+from exh.model import packed
 import exh.prop as prop
 
 class Quantifier(prop.Formula):
 	"""
 	Abstract class for quantified formula
 
+	Class attributes:
+		bitwise (bool) -- whether "fun" only uses bitwise operations, in which case it applies as is to packed truth-values (cf exh.model.packed)
+
 	Attributes:
 		symbol -- display symbol (obsolete)
 		qvar   -- string name of the individual variable of quantification
@@ -16,17 +20,13 @@ class Quantifier(prop.Formula):
 	"""
 
 	substitutable = False
+	bitwise = False
 	plain_symbol = "Q"
 	latex_symbol = "Q"
 
 	def __init__(self, quant_var, scope, domain = None):
-		super(Quantifier, self).__init__(scope)
 		self.qvar = quant_var
-
-		try:
-			self.free_vars.remove(self.qvar)
-		except ValueError:
-			pass
+		super(Quantifier, self).__init__(scope)
 
 		if domain is None:
 			domain = var.default_domain
@@ -39,21 +39,44 @@ class Quantifier(prop.Formula):
 			scope = self.children[0].display_aux(latex)
 		) 
 
-	def evaluate_aux(self, assignment, vm, variables = dict(), free_vars = list()):
-		return self.fun(np.stack([self.children[0].evaluate_aux(assignment, vm, 
-		                                                        dict(variables, **{self.qvar: i}),
-		                                                        free_vars) 
-		                         for i in range(self.domain.n)],
-		                         axis = 0))
+	def dependencies(self, variables, free_vars):
+		# The scope is evaluated once for all individuals, with the quantified variable as an extra (first) axis ;
+		# an outer variable with the same name is shadowed (its axis is kept, under no name, so that the shape of the output does not change)
+		scope_variables = {var: value for var, value in variables.items() if var != self.qvar}
+		scope_free_vars = [self.qvar] + [None if var == self.qvar else var for var in free_vars]
+		return [(self.children[0], scope_variables, scope_free_vars)]
+
+	def combine(self, values, variables, free_vars):
+		results, = values
+
+		# The scope may not depend on the quantified variable (size 1 axis) ; otherwise, its predicates must range over the domain of the quantifier
+		if results.shape[0] == 1:
+			results = np.broadcast_to(results, (self.domain.n,) + results.shape[1:])
+		elif results.shape[0] != self.domain.n:
+			raise Exception("Quantifier over {} individuals applied to a scope over {} individuals for variable {}".format(self.domain.n, results.shape[0], self.qvar))
+
+		# Non-bitwise quantifiers (e.g. counting quantifiers) need boolean values
+		if packed.is_packed(results) and not self.bitwise:
+			return packed.pack(self.fun(packed.unpack(results, axis = -1)), axis = -1)
+		else:
+			return self.fun(results)
+
+	def free_vars_aux(self):
+		return [var for var in super(Quantifier, self).free_vars_aux() if var != self.qvar]
 
 	def fun(self, results):
 		raise Exception("Evaluation of abstract class Quantifier ; use Universal or Existential class")
 
-	def __eq__(self, other):
-		if self.__class__ is other.__class__:
-			if self.qvar == other.qvar:
-				return self.children[0] == other.children[0]
-		return False
+	def symbolic_aux(self, algebra, vm, variables):
+		return self.symbolic_fun(algebra, [self.children[0].symbolic_aux(algebra, vm, dict(variables, **{self.qvar: i}))
+		                                   for i in range(self.domain.n)])
+
+	def symbolic_fun(self, algebra, results):
+		"""Counterpart of "fun" for symbolic compilation: combines the nodes of the scope for every individual"""
+		raise Exception("Symbolic compilation of abstract class Quantifier ; use Universal or Existential class")
+
+	def key_aux(self):
+		return (self.__class__.__name__, self.qvar, self.domain.n, self.children[0].key)
 
 	@property
 	def scope(self):
@@ -71,22 +94,30 @@ class Quantifier(prop.Formula):
 class Universal(Quantifier):
 	plain_symbol = "\u2200"
 	latex_symbol = r"\forall"
+	bitwise = True
 
 	def __init__(self, *args, **kwargs):
 		super(Universal, self).__init__(*args, **kwargs)
 
 	def fun(self, results):
-		return np.min(results, axis = 0)
+		return np.bitwise_and.reduce(results, axis = 0)
+
+	def symbolic_fun(self, algebra, results):
+		return algebra.conj(results)
 
 class Existential(Quantifier):
 	plain_symbol = "\u2203"
 	latex_symbol = r"\exists"
+	bitwise = True
 
 	def __init__(self, *args, **kwargs):
 		super(Existential, self).__init__(*args, **kwargs)
 
 	def fun(self, results):
-		return np.max(results, axis = 0)
+		return np.bitwise_or.reduce(results, axis = 0)
+
+	def symbolic_fun(self, algebra, results):
+		return algebra.disj(results)
 
 class C:
 	"""
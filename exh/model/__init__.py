@@ -1,2 +1,7 @@
 from .vars  import *
-from .model import *
\ No newline at end of file
+from .model import *
+from .packed import PackedUniverse
+from .stream import StreamingUniverse
+from .bdd import BDDUniverse
+from .symmetric import SymmetricUniverse
+from .memmap import MemmapUniverse
@@ -0,0 +1,294 @@
+"""
+Reduced ordered binary decision diagrams (ROBDDs) and a Universe backed by them.
+The variables of the diagrams are the bits of a VarManager, ordered by their position.
+"""
+import sys
+import numpy as np
+
+import exh.utils as utils
+from exh.prop.symbolic import Algebra
+from .model import Universe
+
+
+class BDD(Algebra):
+	"""
+	Manager of shared ROBDDs. Nodes are integers ; 0 and 1 are the terminal nodes (false and true).
+	Two nodes denote the same boolean function iff they are the same integer.
+
+	Attributes:
+		var, low, high (list[int]) -- var[node] is the bit tested at node, low[node] (resp. high[node]) the child when the bit is false (resp. true)
+		unique         (dict)      -- maps (var, low, high) triples to existing nodes
+		cache          (dict)      -- results of operations already computed
+	"""
+
+	FALSE    = 0
+	TRUE     = 1
+	TERMINAL = sys.maxsize # var of terminal nodes, below every bit
+
+	def __init__(self):
+		self.var    = [BDD.TERMINAL, BDD.TERMINAL]
+		self.low    = [BDD.FALSE, BDD.TRUE]
+		self.high   = [BDD.FALSE, BDD.TRUE]
+		self.unique = dict()
+		self.cache  = dict()
+
+	@property
+	def n_nodes(self):
+		return len(self.var)
+
+	def node(self, var, low, high):
+		"""Returns the node testing bit "var" with children "low" and "high", creating it if needed"""
+		if low == high:
+			return low
+
+		key = (var, low, high)
+		if key not in self.unique:
+			self.unique[key] = len(self.var)
+			self.var.append(var)
+			self.low.append(low)
+			self.high.append(high)
+
+		return self.unique[key]
+
+
+
+	### ALGEBRA ###
+
+	def true(self):
+		return BDD.TRUE
+
+	def false(self):
+		return BDD.FALSE
+
+	def atom(self, bit):
+		return self.node(bit, BDD.FALSE, BDD.TRUE)
+
+	def neg(self, x):
+		if x <= BDD.TRUE:
+			return 1 - x
+
+		key = ("not", x)
+		if key not in self.cache:
+			self.cache[key] = self.node(self.var[x], self.neg(self.low[x]), self.neg(self.high[x]))
+		return self.cache[key]
+
+	def apply(self, op, x, y):
+		"""Applies binary operation "op" ("and", "or" or "xor") to nodes x and y"""
+		if op == "and":
+			if x == BDD.FALSE or y == BDD.FALSE:
+				return BDD.FALSE
+			elif x == BDD.TRUE or x == y:
+				return y
+			elif y == BDD.TRUE:
+				return x
+		elif op == "or":
+			if x == BDD.TRUE or y == BDD.TRUE:
+				return BDD.TRUE
+			elif x == BDD.FALSE or x == y:
+				return y
+			elif y == BDD.FALSE:
+				return x
+		else:
+			if x == y:
+				return BDD.FALSE
+			elif x == BDD.FALSE:
+				return y
+			elif y == BDD.FALSE:
+				return x
+			elif x == BDD.TRUE:
+				return self.neg(y)
+			elif y == BDD.TRUE:
+				return self.neg(x)
+
+		# All operations are commutative
+		key = (op, min(x, y), max(x, y))
+		if key not in self.cache:
+			var = min(self.var[x], self.var[y])
+			x0, x1 = (self.low[x], self.high[x]) if self.var[x] == var else (x, x)
+			y0, y1 = (self.low[y], self.high[y]) if self.var[y] == var else (y, y)
+			self.cache[key] = self.node(var, self.apply(op, x0, y0), self.apply(op, x1, y1))
+
+		return self.cache[key]
+
+	def conj(self, xs):
+		result = BDD.TRUE
+		for x in xs:
+			result = self.apply("and", result, x)
+		return result
+
+	def disj(self, xs):
+		result = BDD.FALSE
+		for x in xs:
+			result = self.apply("or", result, x)
+		return result
+
+	def xor(self, x, y):
+		return self.apply("xor", x, y)
+
+
+
+	### QUERIES ###
+
+	def count(self, x, n):
+		"""Number of assignments to bits 0, ..., n - 1 that make x true"""
+		memo = {BDD.FALSE: 0, BDD.TRUE: 1}
+
+		def level(node):
+			return min(self.var[node], n)
+
+		def aux(node):
+			if node not in memo:
+				low, high  = self.low[node], self.high[node]
+				memo[node] = (aux(low)  * 2 ** (level(low)  - level(node) - 1)
+				            + aux(high) * 2 ** (level(high) - level(node) - 1))
+			return memo[node]
+
+		return aux(x) * 2 ** level(x)
+
+	def any_sat(self, x):
+		"""Returns a dictionary mapping bits to values that makes x true (bits not in the dictionary can take any value) ; None if x is false"""
+		if x == BDD.FALSE:
+			return None
+
+		assignment = dict()
+		while x != BDD.TRUE:
+			if self.low[x] != BDD.FALSE:
+				assignment[self.var[x]] = False
+				x = self.low[x]
+			else:
+				assignment[self.var[x]] = True
+				x = self.high[x]
+
+		return assignment
+
+	def evaluate(self, x, worlds):
+		"""Truth-values of node x at every world in "worlds" (boolean array of shape (n_worlds, n_bits))"""
+		values = {BDD.FALSE: np.zeros(worlds.shape[0], dtype = "bool"), BDD.TRUE: np.ones(worlds.shape[0], dtype = "bool")}
+
+		# Nodes are created after their children: increasing order is a topological order
+		stack, reachable = [x], set()
+		while stack:
+			node = stack.pop()
+			if node not in reachable and node > BDD.TRUE:
+				reachable.add(node)
+				stack.extend([self.low[node], self.high[node]])
+
+		for node in sorted(reachable):
+			values[node] = np.where(worlds[:, self.var[node]], values[self.high[node]], values[self.low[node]])
+
+		return values[x]
+
+
+
+class BDDUniverse(Universe):
+	"""
+	Universe representing its set of worlds, and the truth-values of formulas, as ROBDDs.
+	Entailment, equivalence, consistency, filtering, model counting and maximal sets are computed on the diagrams, without enumerating worlds.
+	Methods returning explicit truth-tables ("worlds", "evaluate", "truth_table", "restrict") still enumerate all logical possibilities.
+
+	Attributes (in addition to Universe's):
+	bdd        (BDD) -- manager of the diagrams ; it is shared with the universes obtained by "filter"
+	constraint (int) -- node true exactly at the worlds of the universe
+	"""
+
+	def initialize_worlds(self, kwargs):
+		"""
+		Keyword arguments:
+		bdd        -- a BDD manager (default: new manager)
+		constraint -- node specifying the worlds of the universe (default: all worlds)
+		"""
+		self.bdd        = kwargs.get("bdd", BDD())
+		self.constraint = kwargs.get("constraint", BDD.TRUE)
+		self.bits       = None # diagrams only depend on the bits formulas read: there is nothing to project
+
+	def compile(self, f, **kwargs):
+		"""Returns the BDD node of formula f ; keyword arguments "variables" provide values for free variables"""
+		return f.symbolic(self.bdd, vm = self.vm, variables = kwargs.get("variables"))
+
+	@property
+	def n_worlds(self):
+		return self.bdd.count(self.constraint, self.n)
+
+	@property
+	def worlds(self):
+		worlds = utils.getAssignment(self.n)
+		return worlds[self.bdd.evaluate(self.constraint, worlds)]
+
+	def truth_values(self, *fs, **kwargs):
+		worlds = self.worlds
+		return [self.bdd.evaluate(self.compile(f, **kwargs), worlds) for f in fs]
+
+	def fingerprints(self, *fs, **kwargs):
+		# Diagrams are canonical: nodes identify formulas up to equivalence
+		return [self.bdd.apply("and", self.constraint, self.compile(f, **kwargs)) for f in fs]
+
+	def count(self, *fs, **kwargs):
+		"""Number of worlds in universe where formulas fs are all true"""
+		return self.bdd.count(self.bdd.conj([self.constraint] + [self.compile(f, **kwargs) for f in fs]), self.n)
+
+	def consistent(self, *fs):
+		return self.bdd.conj([self.constraint] + [self.compile(f) for f in fs]) != BDD.FALSE
+
+	def entails(self, f1, f2):
+		return self.bdd.conj([self.constraint, self.compile(f1), self.bdd.neg(self.compile(f2))]) == BDD.FALSE
+
+	def equivalent(self, f1, f2):
+		return self.bdd.conj([self.constraint, self.compile(f1)]) == self.bdd.conj([self.constraint, self.compile(f2)])
+
+	def entailment_matrix(self, *fs, **kwargs):
+		# fs[i] entails fs[j] iff the diagram of fs[i] & ~fs[j] (under the constraint) is false
+		bdd   = self.bdd
+		nodes = [bdd.apply("and", self.constraint, self.compile(f, **kwargs)) for f in fs]
+		return np.array([[bdd.apply("and", x, bdd.neg(y)) == BDD.FALSE for y in nodes] for x in nodes], dtype = "bool")
+
+	def satisfying_world(self, node):
+		"""Returns a world of the universe (boolean array of n bits) where node is true, or None ; bits the node does not depend on are false"""
+		assignment = self.bdd.any_sat(self.bdd.apply("and", self.constraint, node))
+		if assignment is None:
+			return None
+		return np.array([assignment.get(bit, False) for bit in range(self.n)], dtype = "bool")
+
+	def witness(self, *fs):
+		return self.satisfying_world(self.bdd.conj([self.compile(f) for f in fs]))
+
+	def counterexample(self, f1, f2):
+		return self.satisfying_world(self.bdd.apply("and", self.compile(f1), self.bdd.neg(self.compile(f2))))
+
+	def difference(self, f1, f2):
+		return self.satisfying_world(self.bdd.xor(self.compile(f1), self.compile(f2)))
+
+	def restrict(self, indices):
+		"""Returns a Universe object (not backed by BDDs) restricted to the worlds with indices in "indices" argument"""
+		return Universe(vm = self.vm, worlds = self.worlds[indices])
+
+	def filter(self, *fs, **kwargs):
+		constraint = self.bdd.conj([self.constraint] + [self.compile(f, **kwargs) for f in fs])
+		return BDDUniverse(vm = self.vm, bdd = self.bdd, constraint = constraint)
+
+	def maximal_sets(self, props, **kwargs):
+		"""
+		Same as alternatives.find_maximal_sets, computed on BDDs.
+		Repeatedly, pick a world outside of the maximal sets found so far and grow the set of propositions true at that world into a maximal set.
+		"""
+		bdd   = self.bdd
+		nodes = [self.compile(f, **kwargs) for f in props]
+
+		maximal_sets = []
+		uncovered    = self.constraint # worlds whose propositions are not included in a maximal set found so far
+
+		while uncovered != BDD.FALSE:
+			seed    = bdd.any_sat(uncovered)
+			world   = np.array([[seed.get(bit, False) for bit in range(self.n)]], dtype = "bool")
+			current = [bool(bdd.evaluate(node, world)[0]) for node in nodes]
+			region  = bdd.conj([self.constraint] + [node for node, included in zip(nodes, current) if included])
+
+			# Grow the set into a maximal one
+			for i, node in enumerate(nodes):
+				if not current[i] and bdd.apply("and", region, node) != BDD.FALSE:
+					current[i] = True
+					region     = bdd.apply("and", region, node)
+
+			maximal_sets.append(current)
+			uncovered = bdd.apply("and", uncovered, bdd.disj([node for node, included in zip(nodes, current) if not included]))
+
+		return np.array(maximal_sets, dtype = "bool").reshape(len(maximal_sets), len(props))
@@ -0,0 +1,78 @@
+"""
+Memoization of the truth-values of subformulas.
+Alternatives to a prejacent share most of their subformulas with it and with one another ;
+a TruthCache attached to a universe makes sure every distinct subformula is evaluated once against the worlds of that universe.
+"""
+from collections import OrderedDict
+
+from . import options
+
+
+class TruthCache:
+	"""
+	Least-recently-used memo of the truth-values of formulas against a fixed set of worlds.
+	Entries are identified by the structural key of the formula (cf Formula.key), the values of its free variables and the variables left free.
+
+	Attributes:
+		max_size (int)         -- maximal total size of the cached arrays, in bytes
+		size     (int)         -- current total size of the cached arrays, in bytes
+		entries  (OrderedDict) -- maps keys to truth-values, from least to most recently used
+		hits, misses (int)     -- number of lookups that found (resp. did not find) an entry
+	"""
+
+	def __init__(self, max_size = None):
+		self.max_size = options.cache_size if max_size is None else max_size
+		self.size     = 0
+		self.entries  = OrderedDict()
+		self.hits     = 0
+		self.misses   = 0
+
+	def __len__(self):
+		return len(self.entries)
+
+	def clear(self):
+		self.entries.clear()
+		self.size = 0
+
+	@staticmethod
+	def key(f, variables, free_vars):
+		"""Returns the key of the values of f with values "variables" of bound variables and free variables "free_vars" """
+		return (f.key, tuple((var, variables[var]) for var in f.free_vars if var in variables), tuple(free_vars))
+
+	def get(self, key):
+		"""Returns the values stored for key, or None if there are none"""
+		try:
+			value = self.entries[key]
+		except KeyError:
+			self.misses += 1
+			return None
+
+		self.hits += 1
+		self.entries.move_to_end(key)
+		return value
+
+	def put(self, key, value):
+		if value.nbytes <= self.max_size:
+			value.flags.writeable = False # the array is shared by every formula that has f as a subformula
+			self.entries[key] = value
+			self.size        += value.nbytes
+
+			while self.size > self.max_size:
+				_, evicted = self.entries.popitem(last = False)
+				self.size -= evicted.nbytes
+
+	def evaluate(self, f, assignment, vm, variables, free_vars):
+		"""Returns the truth-values of f (as would f.evaluate_aux), computing them only if they are not in the cache"""
+
+		# Cheap formulas (e.g. predicates, negations) are not stored ; their subformulas are.
+		if not f.memoize:
+			return f.evaluate_aux(assignment, vm, variables, free_vars, cache = self)
+
+		key   = self.key(f, variables, free_vars)
+		value = self.get(key)
+
+		if value is None:
+			value = f.evaluate_aux(assignment, vm, variables, free_vars, cache = self)
+			self.put(key, value)
+
+		return value
@@ -0,0 +1,141 @@
+"""
+Universe whose worlds are stored in memory-mapped files rather than in RAM, for problems whose worlds do not fit in memory (e.g. 28 bits and more)
+"""
+import tempfile
+import numpy as np
+
+import exh.utils as utils
+from . import options
+from .model import Universe
+from .cache import TruthCache
+from exh.prop import plan
+
+
+def scratch_array(shape, dtype, directory = None):
+	"""
+	Returns an array of shape "shape" backed by an anonymous temporary file in "directory" (default: options.scratch_dir) ;
+	the file is deleted as soon as the array (and every view of it) is garbage-collected
+	"""
+	if directory is None:
+		directory = options.scratch_dir
+
+	# Empty files cannot be mapped
+	if np.prod(shape, dtype = "int64") == 0:
+		return np.empty(shape, dtype = dtype)
+
+	return np.memmap(tempfile.TemporaryFile(dir = directory), dtype = dtype, mode = "w+", shape = shape)
+
+
+class MemmapUniverse(Universe):
+	"""
+	MemmapUniverse stores its worlds in a memory-mapped file (cf scratch_array) and processes them "chunk_size" worlds at a time,
+	so that RAM usage is proportional to "chunk_size" rather than to the number of worlds.
+	A restricted MemmapUniverse shares the world file of the universe it comes from, and only stores the indices of its worlds (in another file).
+	Truth-tables returned by "evaluate" and "truth_values" are memory-mapped as well (formulas must be closed, as in StreamingUniverse) ; values of subformulas are only memoized within a chunk.
+
+	Attributes (in addition to Universe's):
+	base       (np.memmap[bool]) -- all the worlds the universe was generated with (shared by restricted universes)
+	indices    (np.memmap[int])  -- the indices in "base" of the worlds of the universe, or None if it has all the worlds of "base"
+	chunk_size (int)             -- maximal number of worlds read at once
+	directory  (str)             -- the directory of the files (None for the system's temporary directory)
+
+	Properties:
+	worlds -- boolean array of the worlds, as in Universe (memory-mapped if the universe is not restricted, loaded in RAM otherwise)
+	"""
+
+	def initialize_worlds(self, kwargs):
+		"""
+		Keyword arguments:
+		worlds     -- boolean array of worlds, copied to a file (default: every logical possibility, generated chunk by chunk), or
+		base, indices -- memory-mapped worlds and indices of the worlds kept (cf class attributes)
+		chunk_size -- defaults to options.chunk_size
+		directory  -- defaults to options.scratch_dir
+		"""
+		self.chunk_size = kwargs.get("chunk_size", options.chunk_size)
+		self.directory  = kwargs.get("directory",  options.scratch_dir)
+
+		if "base" in kwargs:
+			self.base    = kwargs["base"]
+			self.indices = kwargs.get("indices")
+			return
+
+		self.indices = None
+		n_worlds     = kwargs["worlds"].shape[0] if "worlds" in kwargs else self.n_combinations
+		self.base    = scratch_array((n_worlds, self.n), "bool", self.directory)
+
+		for start in range(0, n_worlds, self.chunk_size):
+			stop = min(start + self.chunk_size, n_worlds)
+			self.base[start:stop] = kwargs["worlds"][start:stop] if "worlds" in kwargs else utils.getAssignment(self.n, start, stop, self.bits)
+
+	@property
+	def n_worlds(self):
+		return self.base.shape[0] if self.indices is None else self.indices.shape[0]
+
+	@property
+	def worlds(self):
+		return self.base if self.indices is None else self.base[self.indices]
+
+	def chunks(self):
+		"""
+		Yields the worlds of the universe (loaded in RAM), by arrays of at most "chunk_size" worlds, along with their indices in "base" (None if the universe is not restricted)
+		Worlds are contiguous in files, so that they are read sequentially ; chunks are transposed in RAM so that the values of every bit are contiguous (cf Universe.columns)
+		"""
+		for start in range(0, self.n_worlds, self.chunk_size):
+			stop = min(start + self.chunk_size, self.n_worlds)
+
+			if self.indices is None:
+				yield np.ascontiguousarray(self.base[start:stop].T).T, None
+			else:
+				indices = np.asarray(self.indices[start:stop])
+				yield np.ascontiguousarray(self.base[indices].T).T, indices
+
+	def truth_value_chunks(self, *fs, **kwargs):
+		# Worlds differ from one chunk to the next: values of subformulas are only shared within a chunk
+		for worlds, _ in self.chunks():
+			kwargs["cache"] = TruthCache(self.cache.max_size)
+			yield worlds, plan.evaluate(fs, assignment = worlds, vm = self.vm, **dict(kwargs, no_flattening = True))
+
+	def evaluate_chunks(self, *fs, **kwargs):
+		for _, values in self.truth_value_chunks(*fs, **kwargs):
+			yield np.transpose(np.stack(values))
+
+	def evaluate(self, *fs, **kwargs):
+		# The truth-table is written chunk by chunk into a file
+		kwargs["no_flattening"] = True
+		output = scratch_array((self.n_worlds, len(fs)), "bool", self.directory)
+		start  = 0
+
+		for values in self.evaluate_chunks(*fs, **kwargs):
+			output[start:start + values.shape[0]] = values
+			start += values.shape[0]
+
+		return output
+
+	def truth_values(self, *fs, **kwargs):
+		return list(np.moveaxis(self.evaluate(*fs, **kwargs), -1, 0))
+
+	def restrict(self, indices):
+		"""Returns a MemmapUniverse restricted to the worlds with indices in "indices" argument ; it shares the world file of this universe and writes the indices of its worlds to a file"""
+		indices = np.asarray(indices)
+		if indices.dtype == "bool":
+			indices = np.flatnonzero(indices)
+
+		stored    = scratch_array(indices.shape, "int64", self.directory)
+		stored[:] = indices if self.indices is None else np.asarray(self.indices)[indices]
+		return MemmapUniverse(vm = self.vm, base = self.base, indices = stored, chunk_size = self.chunk_size, directory = self.directory, cache_size = self.cache.max_size)
+
+	def filter(self, *fs, **kwargs):
+		# Indices of the worlds kept are written chunk by chunk into a file large enough for all worlds (parts of it that are not written take no disk space on most systems)
+		indices = scratch_array((self.n_worlds,), "int64", self.directory)
+		n_kept  = 0
+		start   = 0
+
+		for worlds, base_indices in self.chunks():
+			values = np.stack(plan.evaluate(fs, assignment = worlds, vm = self.vm, no_flattening = True, cache = TruthCache(self.cache.max_size), **kwargs))
+			keep   = np.flatnonzero(np.all(values, axis = 0))
+
+			indices[n_kept:n_kept + len(keep)] = keep + start if base_indices is None else base_indices[keep]
+			n_kept += len(keep)
+			start  += worlds.shape[0]
+
+		return MemmapUniverse(vm = self.vm, base = self.base, indices = indices[:n_kept], chunk_size = self.chunk_size, directory = self.directory, cache_size = self.cache.max_size)
@@ -1,10 +1,14 @@
 import numpy as np
 import itertools
+import functools
+import hashlib
 
 from . import options
 import exh.utils as utils
 from .vars import VarManager
+from .cache import TruthCache
 from exh.utils.table import Table
+from exh.prop import plan
 # from formula import Var
 
 class Universe:
@@ -14,11 +18,17 @@ class Universe:
 
 	Attributes:
 	n      -- number of bits that specify the world (example: propositional varaible a requires 1 bit, unary predicates a(x) as many bits as there are individuaks)
-	worlds -- numpy boolean array worlds[i, j] specifies the truth-value of the j-th bit at the i-th world
+	columns -- C-contiguous numpy boolean array ; columns[j, i] specifies the truth-value of the j-th bit at the i-th world
 	vm     -- variable manager ; specifies a mapping from predicates to bit position (example: predicate variable "a" is mapped to "x")
+	cache  -- TruthCache memoizing the values of subformulas at the worlds of the universe
+	chunk_caches -- maps chunks of worlds (start, stop) to the TruthCache of the values of subformulas at these worlds (cf chunk_cache)
+	bits   -- the bits whose truth-values the universe enumerates, or None for all of them (cf projection) ; the other bits are false at every world
 	
 	Properties:
 	n_worlds -- number of worlds in universe
+	n_combinations -- number of combinations of truth-values of the enumerated bits (2 ** n when all bits are enumerated)
+	worlds   -- numpy boolean array worlds[i, j] specifies the truth-value of the j-th bit at the i-th world (a transposed view of "columns" ;
+	            predicates are thus evaluated by reading contiguous rows of "columns", without copies)
 	"""
 
 	def __init__(self, **kwargs):
@@ -27,6 +37,9 @@ class Universe:
 		f  -- one formula from which to extract the predicates
 		vm -- a variable manager object
 		fs -- a list of formulas from which to ex
+		cache_size -- maximal size in bytes of the memoized values of subformulas (default: options.cache_size)
+		bits -- only enumerate the truth-values of these bits (e.g. the bits read by some formulas, cf projection.relevant_bits) ; 
+		        universes which do not enumerate worlds (BDDUniverse, SymmetricUniverse) ignore it
 		"""
 		
 		if "f" in kwargs:
@@ -37,22 +50,51 @@ class Universe:
 			self.vm = VarManager.merge(*[f.vm for f in kwargs["fs"]])
 
 		self.n = self.vm.n
+		self.cache = TruthCache(kwargs.get("cache_size"))
+		self.chunk_caches = dict()
+		self.bits = None if kwargs.get("bits") is None else sorted(kwargs["bits"])
+		self.initialize_worlds(kwargs)
 
-		if "worlds" not in kwargs:
-			self.worlds = utils.getAssignment(self.n)
+	def initialize_worlds(self, kwargs):
+		"""
+		Sets the worlds of the universe from constructor arguments ; all logical possibilities are generated if neither "worlds" nor "columns" is provided
+
+		Keyword arguments:
+		worlds  -- boolean array of shape (n_worlds, n), or
+		columns -- the same array transposed (cf class attributes)
+		"""
+		if "columns" in kwargs:
+			self.columns = kwargs["columns"]
+		elif "worlds" in kwargs:
+			self.worlds  = kwargs["worlds"]
 		else:
-			self.worlds = kwargs["worlds"]
+			self.columns = utils.getColumns(self.n, bits = self.bits)
+
+	@property
+	def n_combinations(self):
+		return 2 ** (self.n if self.bits is None else len(self.bits))
+
+	@property
+	def worlds(self):
+		return self.columns.T
+
+	@worlds.setter
+	def worlds(self, worlds):
+		self.columns = np.ascontiguousarray(np.transpose(worlds))
 
 	@property
 	def n_worlds(self):
-		return self.worlds.shape[0]
+		return self.columns.shape[1]
+
+	@classmethod
+	def supports(cls, *fs):
+		"""Whether universes of this class can evaluate formulas fs (overridden by subclasses which only represent some of the worlds)"""
+		return True
 	
 
 	def consistent(self, *fs):
-
-		output = self.evaluate(*fs)
-
-		return np.any(np.min(output, axis = 1))
+		"""Checks if formulas fs are true together at some world in universe ; stops at the first chunk of worlds where they are (cf search)"""
+		return self.witness(*fs) is not None
 
 	# def set(pred, value, **variables):
 	# 	if isinstance(pred, Var):
@@ -84,19 +126,140 @@ class Universe:
 
 
 	def entails(self, f1, f2):
-		"""Checks if f1 entails f2 in universe"""
-		return not self.consistent(f1 & ~f2)
+		"""Checks if f1 entails f2 in universe ; stops at the first chunk of worlds with a counterexample (cf search)"""
+		return self.counterexample(f1, f2) is None
 
 	def equivalent(self, f1, f2):
-		output = self.evaluate(f1, f2)
-		return np.all(output[:, 0] == output[:, 1])
+		"""Checks if f1 and f2 are equivalent in universe ; stops at the first chunk of worlds where they differ (cf search)"""
+		return self.difference(f1, f2) is None
+
+	def entailment_matrix(self, *fs, **kwargs):
+		"""
+		Returns the entailment relation between formulas fs in universe, as a boolean matrix: returned_value[i, j] is True iff fs[i] entails fs[j].
+		Formulas are evaluated once ; their values are packed as bits and compared 64 worlds at a time (cf packed.inclusion_matrix), chunk by chunk (cf packed_chunks).
+		Keyword arguments are passed to "evaluate" (e.g. "variables").
+		"""
+		from .packed import inclusion_matrix
+
+		entails = np.ones((len(fs), len(fs)), dtype = "bool")
+		for values in self.packed_chunks(*fs, **kwargs):
+			entails &= inclusion_matrix(values)
+		return entails
+
+	def equivalence_matrix(self, *fs, **kwargs):
+		"""Returns the equivalence relation between formulas fs in universe, as a boolean matrix (cf entailment_matrix)"""
+		entails = self.entailment_matrix(*fs, **kwargs)
+		return entails & entails.T
+
+	def packed_chunks(self, *fs, **kwargs):
+		"""Yields the values of formulas fs by chunks of worlds (cf evaluate_chunks), packed as bits (cf packed.pack) in arrays of shape (len(fs), n_words)"""
+		from .packed import pack
+
+		for output in self.evaluate_chunks(*fs, **dict(kwargs, no_flattening = True)):
+			yield pack(np.transpose(output), axis = 1)
+
+	def witness(self, *fs):
+		"""Returns a world (boolean array of n bits, as the rows of "worlds") where formulas fs are all true, or None if there is none"""
+		return self.search(fs, lambda values: functools.reduce(np.bitwise_and, values))
+
+	def counterexample(self, f1, f2):
+		"""Returns a world where f1 is true and f2 is false (i.e. showing that f1 does not entail f2), or None if there is none"""
+		return self.search([f1, f2], lambda values: values[0] & ~values[1])
+
+	def difference(self, f1, f2):
+		"""Returns a world where f1 and f2 have different truth-values, or None if there is none"""
+		return self.search([f1, f2], lambda values: values[0] ^ values[1])
+
+	def search(self, fs, condition):
+		"""
+		Returns the first world at which "condition" holds, or None if there is none.
+		Worlds are processed chunk by chunk (cf truth_value_chunks) ; the search stops at the first chunk containing such a world, 
+		so that queries which have a witness (e.g. a counterexample to an entailment) usually cost a fraction of the evaluation of a whole truth-table.
+
+		Arguments:
+			fs        (list[Formula]) -- closed formulas to evaluate
+			condition (function)      -- maps the list of the values of fs at a chunk of worlds to a boolean array with one value per world ;
+			                             it should only use bitwise operators (&, |, ^, ~), so that it also applies to packed values (cf PackedUniverse)
+		"""
+		for worlds, values in self.truth_value_chunks(*fs):
+			found = np.flatnonzero(condition(values))
+			if len(found):
+				return np.array(worlds[found[0]])
+
+		return None
 
 	def evaluate(self, *fs, **kwargs):
 		"""
 		Evaluate formules against every world in universe
 		"""
 
-		return np.transpose(np.stack([f.evaluate(assignment = self.worlds, vm = self.vm, **kwargs) for f in fs]))
+		return np.transpose(np.stack(self.truth_values(*fs, **kwargs)))
+
+	def evaluate_chunks(self, *fs, **kwargs):
+		"""
+		Evaluate formulas against every world in universe, by groups of worlds
+		Yields arrays in the format of "evaluate" ; a Universe has a single chunk, but subclasses (e.g. StreamingUniverse) keep memory bounded by yielding many small ones.
+		"""
+		yield self.evaluate(*fs, **kwargs)
+
+	def chunk_bounds(self):
+		"""
+		Yields the bounds (start, stop) of the chunks of worlds examined by queries (cf search): the first chunk has options.query_chunk_size worlds,
+		following chunks twice as many as the previous one, up to options.chunk_size
+		"""
+		start, size = 0, options.query_chunk_size
+		while start < self.n_worlds:
+			yield start, min(start + size, self.n_worlds)
+			start, size = start + size, min(2 * size, max(options.chunk_size, options.query_chunk_size))
+
+	def chunk_cache(self, start, stop):
+		"""
+		Returns the TruthCache of the worlds from "start" to "stop" ; chunks are the same from one query to the next, and so are their caches.
+		The cache of all the worlds is self.cache ; the maximal size of the cache of a chunk is proportional to its number of worlds.
+		"""
+		if (start, stop) == (0, self.n_worlds):
+			return self.cache
+
+		if (start, stop) not in self.chunk_caches:
+			self.chunk_caches[start, stop] = TruthCache(self.cache.max_size * (stop - start) // self.n_worlds)
+		return self.chunk_caches[start, stop]
+
+	def truth_value_chunks(self, *fs, **kwargs):
+		"""
+		Yields pairs (worlds, values) for every chunk of worlds of the universe (cf chunk_bounds), 
+		where "values" is the list of the values of formulas fs at "worlds" (as in truth_values, without flattening)
+		"""
+		kwargs["no_flattening"] = True
+		if self.n_worlds <= options.query_chunk_size:
+			yield self.worlds, self.truth_values(*fs, **kwargs)
+			return
+
+		for start, stop in self.chunk_bounds():
+			# Slices of "columns" are contiguous for every bit
+			worlds = self.columns[:, start:stop].T
+			yield worlds, plan.evaluate(fs, assignment = worlds, vm = self.vm, **dict(kwargs, cache = self.chunk_cache(start, stop)))
+
+	def fingerprints(self, *fs, **kwargs):
+		"""
+		Returns one fingerprint (bytes) per formula ; formulas have the same fingerprint iff they are equivalent in universe (up to collisions of 128-bit hashes)
+		Fingerprints hash the packed truth-values of formulas, chunk by chunk (cf evaluate_chunks)
+		"""
+		hashes = [hashlib.blake2b(digest_size = 16) for _ in fs]
+
+		for output in self.evaluate_chunks(*fs, no_flattening = True, **kwargs):
+			for h, values in zip(hashes, np.moveaxis(output, -1, 0)):
+				h.update(np.packbits(values).tobytes())
+
+		return [h.digest() for h in hashes]
+
+	def truth_values(self, *fs, **kwargs):
+		"""
+		Returns the list of the values of formulas fs at every world in universe (one boolean array per formula)
+		Formulas are evaluated at once, sharing their common subformulas (cf exh.prop.plan) ;
+		values of subformulas are memoized in self.cache, and thus only computed once across calls.
+		"""
+		kwargs.setdefault("cache", self.cache)
+		return plan.evaluate(fs, assignment = self.worlds, vm = self.vm, **kwargs)
 
 
 	def name_worlds(self):
@@ -110,7 +273,7 @@ class Universe:
 		def str_tuple(tuple):
 			return "({})".format(",".join(list(map(str, t))))
 
-		nvars = self.worlds.shape[1]
+		nvars = self.n
 		names = [i for i in range(nvars)]
 		name_vars = ["A{}".format(key) for key in self.vm.preds.keys()]
 
@@ -142,13 +305,30 @@ class Universe:
 	def restrict(self, indices):
 		"""Returns Universe object restricted to the worlds with indices in "indices" argument"""
 
-		return Universe(vm = self.vm, worlds = self.worlds[indices])
+		return Universe(vm = self.vm, columns = self.restricted_columns(indices), cache_size = self.cache.max_size)
+
+	def restricted_columns(self, indices):
+		"""Returns the columns of the worlds with indices in "indices" argument (a boolean mask or integer indices), as a C-contiguous array"""
+		indices = np.asarray(indices)
+		if indices.dtype == "bool":
+			indices = np.flatnonzero(indices)
+
+		# Unlike fancy indexing, np.take along the last axis returns a C-contiguous array
+		return np.take(self.columns, indices, axis = 1)
+
+	def filter(self, *fs, **kwargs):
+		"""Returns Universe object restricted to the worlds where all formulas fs are true ; keyword arguments are passed to "evaluate" """
+
+		return self.restrict(np.all(self.evaluate(*fs, no_flattening = True, **kwargs), axis = 1))
 
 
 	def update(self, var):
 		self.vm = VarManager.merge(self.vm, var.vm)
 		self.n = self.vm.n
-		self.worlds = utils.getAssignment(n)
+		self.bits = None
+		self.columns = utils.getColumns(self.n)
+		self.cache.clear()
+		self.chunk_caches.clear()
 
 	def truth_table(self, *fs, **kwargs):
 		"""Display a truth-table for formulas fs. Keyword arguments are passed to table (cf exh.utils.table)"""
@@ -156,8 +336,7 @@ class Universe:
 		output = self.evaluate(*fs)
 
 		table = Table(**kwargs)
-		nvars = self.worlds.shape[1]
-		nworlds = self.worlds.shape[0]
+		nvars = self.n
 
 		# We find the names for the columns
 		name_cols = self.name_worlds() + [str(f) for f in fs]
@@ -7,3 +7,15 @@ dom_quant = 3
 # Whether display is in Latex by default
 latex_display = True
 
+# Number of worlds generated at once by StreamingUniverse
+chunk_size = 2 ** 16
+
+# Number of worlds in the first chunk examined by consistency, entailment and equivalence queries (cf Universe.search) ;
+# following chunks are twice as large as the previous one, up to "chunk_size" worlds
+query_chunk_size = 2 ** 12
+
+# Directory of the temporary files of MemmapUniverse (None for the system's temporary directory)
+scratch_dir = None
+
+# Maximal size (in bytes) of the truth-values of subformulas memoized by a universe (cf exh.model.cache)
+cache_size = 2 ** 28
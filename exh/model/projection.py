@@ -0,0 +1,55 @@
+"""
+Cone-of-influence projection.
+Formulas often read only some of the bits of their VarManager (e.g. predicates applied to the dummy values of free variables, or quantifiers restricted to some individuals) ;
+a universe only needs to enumerate the truth-values of the bits read by the formulas it evaluates (cf Universe, "bits" argument), the other bits being fixed.
+Moreover, formulas reading disjoint sets of bits are independent: the worlds are the combinations of the worlds of every group of bits,
+and problems over these formulas (e.g. maximal sets, cf Exhaust.maximal_sets) can be solved group by group, in universes of 2 ** k worlds for groups of k bits.
+"""
+
+
+def predicate_bits(f, vm):
+	"""Returns the sorted list of all the bits of vm devoted to the predicates of f ; a superset of f.bits(vm), computed without going through the formula"""
+	bits = []
+	for pred in sorted(f.vm.preds, key = vm.pred_to_vm_index.get):
+		index = vm.pred_to_vm_index[pred]
+		bits.extend(range(vm.offset[index], vm.offset[index] + vm.memory[index]))
+	return bits
+
+def relevant_bits(fs, vm = None, variables = None):
+	"""Returns the sorted list of the bits read by some formula in fs (cf Formula.bits)"""
+	return sorted(set().union(*(f.bits(vm, variables) for f in fs)))
+
+def independent_groups(supports):
+	"""
+	Partitions formulas into groups of formulas reading disjoint sets of bits (i.e. the connected components of the relation "reads a bit also read by")
+
+	Arguments:
+		supports (list[list[int]]) -- the bits read by every formula (cf Formula.bits)
+
+	Returns:
+		list[tuple[list[int], list[int]]] -- for every group, the indices of its formulas and the (sorted) bits they read ; groups are in order of their first formula
+	"""
+	# Union-find over formulas: formulas reading the same bit are merged
+	parent = list(range(len(supports)))
+
+	def find(i):
+		while parent[i] != i:
+			parent[i] = parent[parent[i]]
+			i = parent[i]
+		return i
+
+	reader = dict() # maps every bit to a formula reading it
+	for i, bits in enumerate(supports):
+		for bit in bits:
+			if bit in reader:
+				parent[find(i)] = find(reader[bit])
+			else:
+				reader[bit] = i
+
+	groups = dict()
+	for i, bits in enumerate(supports):
+		indices, group_bits = groups.setdefault(find(i), ([], set()))
+		indices.append(i)
+		group_bits.update(bits)
+
+	return [(indices, sorted(group_bits)) for indices, group_bits in groups.values()]
@@ -0,0 +1,84 @@
+"""
+Universe whose worlds are generated on the fly, chunk by chunk, rather than stored
+"""
+import numpy as np
+
+import exh.utils as utils
+from . import options
+from .model import Universe
+from .cache import TruthCache
+from exh.prop import plan
+
+
+class StreamingUniverse(Universe):
+	"""
+	StreamingUniverse never holds all of its worlds in memory. 
+	Worlds are generated from ranges of world indices, "chunk_size" worlds at a time ; a restricted StreamingUniverse filters out the worlds not satisfying its constraints as they are generated.
+	Methods "consistent", "entails", "equivalent" (which stop at the first chunk settling the query), "filter" and "evaluate_chunks" (and thus alternatives.find_maximal_sets) only use memory proportional to "chunk_size".
+	Methods returning whole truth-tables ("evaluate", "truth_table") still concatenate results over all worlds.
+
+	Attributes (in addition to Universe's):
+	chunk_size  (int)           -- maximal number of worlds generated at once
+	constraints (list[Formula]) -- formulas which are true at every world of the universe
+	constraint_kwargs (dict)    -- keyword arguments passed to "evaluate" when evaluating constraints (e.g. "variables")
+	"""
+
+	def initialize_worlds(self, kwargs):
+		"""
+		Keyword arguments:
+		chunk_size        -- defaults to options.chunk_size
+		constraints       -- list of formulas which must be true at every world (default: no constraint)
+		constraint_kwargs -- keyword arguments to evaluate constraints with
+		"""
+		self.chunk_size        = kwargs.get("chunk_size", options.chunk_size)
+		self.constraints       = kwargs.get("constraints", [])
+		self.constraint_kwargs = kwargs.get("constraint_kwargs", dict())
+		self._n_worlds         = None if self.constraints else self.n_combinations
+
+	@property
+	def n_worlds(self):
+		# Finding the number of worlds that satisfy the constraints requires one pass over all worlds ; it is only done once
+		if self._n_worlds is None:
+			self._n_worlds = sum(chunk.shape[0] for chunk in self.chunks())
+		return self._n_worlds
+
+	@property
+	def worlds(self):
+		return np.concatenate(list(self.chunks()), axis = 0)
+
+	def chunks(self):
+		"""Yields the worlds of the universe, by arrays of at most "chunk_size" worlds"""
+		for start in range(0, self.n_combinations, self.chunk_size):
+			worlds = utils.getAssignment(self.n, start, min(start + self.chunk_size, self.n_combinations), self.bits)
+
+			if self.constraints:
+				values = plan.evaluate(self.constraints, assignment = worlds, vm = self.vm, no_flattening = True, **self.constraint_kwargs)
+				worlds = worlds[np.bitwise_and.reduce(values, axis = 0)]
+
+			if worlds.shape[0]:
+				yield worlds
+
+	def truth_value_chunks(self, *fs, **kwargs):
+		# Worlds differ from one chunk to the next: values of subformulas are only shared within a chunk
+		for worlds in self.chunks():
+			kwargs["cache"] = TruthCache(self.cache.max_size)
+			yield worlds, plan.evaluate(fs, assignment = worlds, vm = self.vm, **dict(kwargs, no_flattening = True))
+
+	def evaluate_chunks(self, *fs, **kwargs):
+		for _, values in self.truth_value_chunks(*fs, **kwargs):
+			yield np.transpose(np.stack(values))
+
+	def truth_values(self, *fs, **kwargs):
+		kwargs["no_flattening"] = True
+		output = np.concatenate(list(self.evaluate_chunks(*fs, **kwargs)), axis = 0)
+		return list(np.moveaxis(output, -1, 0))
+
+	def restrict(self, indices):
+		"""Returns a (non-streaming) Universe object restricted to the worlds with indices in "indices" argument ; prefer "filter" which does not need to store worlds"""
+		return Universe(vm = self.vm, worlds = self.worlds[indices])
+
+	def filter(self, *fs, **kwargs):
+		if self.constraints and kwargs != self.constraint_kwargs:
+			raise ValueError("Constraints of a StreamingUniverse must all be evaluated with the same keyword arguments")
+
+		return StreamingUniverse(vm = self.vm, chunk_size = self.chunk_size, constraints = self.constraints + list(fs), constraint_kwargs = kwargs, bits = self.bits)
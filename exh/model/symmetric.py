@@ -0,0 +1,109 @@
+"""
+Symmetry reduction: closed formulas whose quantifiers range over whole domains cannot distinguish two worlds
+that only differ by a permutation of the individuals of the domain.
+A SymmetricUniverse only keeps one world per orbit of worlds under such permutations.
+"""
+import itertools
+import numpy as np
+
+import exh.utils as utils
+from . import options
+from .model import Universe
+
+
+def permutations(vm):
+	"""
+	Lists the permutations of bit positions induced by permutations of individuals.
+	All domains of the same size are permuted together, which is a symmetry as long as every domain is.
+
+	Returns:
+		np.ndarray[int] -- array of shape (n_permutations, vm.n) ; the bits of the permuted world w' are given by w'[j] = w[returned_value[g, j]]
+	"""
+	sizes  = sorted(set(size for deps in vm.preds.values() for size in deps))
+	result = []
+
+	for perms in itertools.product(*[itertools.permutations(range(size)) for size in sizes]):
+		perm_of_size = dict(zip(sizes, perms))
+		bits         = np.empty(vm.n, dtype = "int64")
+
+		for pred, deps in vm.preds.items():
+			offset = vm.offset[vm.pred_to_vm_index[pred]]
+
+			for t in np.ndindex(*deps):
+				permuted = tuple(perm_of_size[size][slot] for slot, size in zip(t, deps))
+				bits[offset + (np.ravel_multi_index(t, deps, order = "F") if deps else 0)] = offset + (np.ravel_multi_index(permuted, deps, order = "F") if deps else 0)
+
+		result.append(bits)
+
+	return np.stack(result)
+
+
+class SymmetricUniverse(Universe):
+	"""
+	Universe made of one representative world per orbit under permutations of the individuals (cf module documentation) ;
+	the representative is the world with the lowest index (cf utils.getAssignment).
+	Consistency, entailment, equivalence and maximal sets are the same as in the full universe, for formulas accepted by "supports".
+
+	Attributes (in addition to Universe's):
+	weights (np.ndarray[int]) -- weights[i] is the number of worlds in the orbit of the i-th world
+	"""
+
+	@classmethod
+	def supports(cls, *fs):
+		return all(f.symmetric() for f in fs)
+
+	def initialize_worlds(self, kwargs):
+		"""
+		Keyword arguments:
+		worlds (or columns), weights -- representative worlds (cf Universe) and the size of their orbits (default: one representative for every orbit)
+		chunk_size -- number of worlds generated at once when looking for representatives (default: options.chunk_size)
+		"""
+		# Orbits are computed over all bits
+		self.bits = None
+
+		if "worlds" in kwargs or "columns" in kwargs:
+			super(SymmetricUniverse, self).initialize_worlds(kwargs)
+			self.weights = kwargs["weights"]
+			return
+
+		perms      = permutations(self.vm)
+		chunk_size = kwargs.get("chunk_size", options.chunk_size)
+		powers     = np.left_shift(1, np.arange(self.n, dtype = "int64"))
+
+		worlds, weights = [], []
+		for start in range(0, 2 ** self.n, chunk_size):
+			stop    = min(start + chunk_size, 2 ** self.n)
+			chunk   = utils.getAssignment(self.n, start, stop)
+			indices = np.arange(start, stop, dtype = "int64")
+			fixed   = np.zeros(len(indices), dtype = "int64")
+
+			# Worlds are discarded as soon as some permutation maps them to a world with a lower index
+			for perm in perms:
+				images  = chunk[:, perm].astype("int64") @ powers
+				keep    = images >= indices
+				chunk, indices, fixed = chunk[keep], indices[keep], fixed[keep] + (images[keep] == indices[keep])
+
+			# The orbit of a world has as many worlds as there are permutations, divided by the number of permutations that leave it unchanged
+			worlds.append(chunk)
+			weights.append(len(perms) // fixed)
+
+		self.worlds  = np.concatenate(worlds, axis = 0)
+		self.weights = np.concatenate(weights)
+
+	def truth_values(self, *fs, **kwargs):
+		if kwargs.get("variables") or not self.supports(*fs):
+			raise ValueError("SymmetricUniverse can only evaluate closed formulas which do not distinguish individuals")
+		return super(SymmetricUniverse, self).truth_values(*fs, **kwargs)
+
+	def truth_value_chunks(self, *fs, **kwargs):
+		# Representatives are worlds of the full universe: queries return them as witnesses
+		if kwargs.get("variables") or not self.supports(*fs):
+			raise ValueError("SymmetricUniverse can only evaluate closed formulas which do not distinguish individuals")
+		return super(SymmetricUniverse, self).truth_value_chunks(*fs, **kwargs)
+
+	def count(self, *fs, **kwargs):
+		"""Number of worlds of the full universe where formulas fs are all true"""
+		return int(np.sum(self.weights[np.all(self.evaluate(*fs, no_flattening = True, **kwargs), axis = 1)]))
+
+	def restrict(self, indices):
+		return SymmetricUniverse(vm = self.vm, columns = self.restricted_columns(indices), weights = self.weights[indices], cache_size = self.cache.max_size)
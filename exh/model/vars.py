@@ -1,4 +1,5 @@
 import numpy as np
+import weakref
 from . import options
 from . import exceptions
 
@@ -38,6 +39,8 @@ class VarManager:
 	"""
 	VarManager keeps track of all independent variables in a given system.
 	Maps propositional variables and fully saturated predicate variables to indices
+	VarManager objects are never modified once created ; "get" and "merge" return shared (interned) objects,
+	so that formulas built from the same predicates share their VarManager.
 
 	Example: 
 	System: unary predicate p and proposition q; domain of individuals = 3
@@ -51,11 +54,20 @@ class VarManager:
 		names             -- a dictionary mapping predicate names to their indices 
 		memory            -- a list mapping predicate positions to how many bits are required to define this predicate
 		offset            -- a list mapping predicate positions to the bit index offset at which they are defined.
+		signature         -- a hashable representation of preds and names ; VarManagers with the same signature are equal
 	"""
+
+	interned  = weakref.WeakValueDictionary() # maps signatures to VarManagers ; VarManagers are forgotten when no longer used
+	merges    = dict() # maps tuples of VarManagers to the result of merging them
+	max_memo  = 2 ** 16 # number of merges remembered
+
 	def __init__(self, preds, names = dict()):
 		self.preds = preds 
 		self.names = names
 
+		self.signature = (tuple((pred, tuple(deps)) for pred, deps in preds.items()), tuple(names.items()))
+		self._hash     = hash(self.signature)
+
 		# pred_to_vm_index : dictionary mapping Formula's predicate indices to VarManager's predicate indices
 		self.pred_to_vm_index = {pred_idx: vm_idx for vm_idx, pred_idx in enumerate(self.preds.keys())}
 		self.linearize()
@@ -76,9 +88,35 @@ class VarManager:
 		for mem in self.memory[:-1]:
 			self.offset.append(self.offset[-1] + mem)
 
+	def __eq__(self, other):
+		return isinstance(other, VarManager) and (self is other or self.signature == other.signature)
+
+	def __hash__(self):
+		return self._hash
+
+	@staticmethod
+	def get(preds, names = dict()):
+		"""Returns the VarManager for predicates "preds" and names "names", reusing an existing one if possible"""
+		vm = VarManager(preds, names)
+		return VarManager.interned.setdefault(vm.signature, vm)
+
 	def merge(*vms):
-		return VarManager(preds = {k: v for vm in vms for k, v in vm.preds.items()},
-						  names = {k: v for vm in vms for k, v in vm.names.items()})
+		"""Returns the VarManager for the predicates of all vms ; merges are memoized, and merging a single VarManager returns it"""
+		if len(vms) == 1:
+			return vms[0]
+
+		try:
+			return VarManager.merges[vms]
+		except KeyError:
+			pass
+
+		if len(VarManager.merges) >= VarManager.max_memo:
+			VarManager.merges.clear()
+
+		result = VarManager.get(preds = {k: v for vm in vms for k, v in vm.preds.items()},
+		                        names = {k: v for vm in vms for k, v in vm.names.items()})
+		VarManager.merges[vms] = result
+		return result
 
 	@property
 	def n(self):
@@ -1,10 +1,34 @@
 from exh.prop    import Or, And
 from exh.fol     import Existential, Universal
 from exh.scales  import SimpleScales
+from exh.model   import Universe
 
 # Default scalar scales
 scales = SimpleScales([{Or, And}, {Existential, Universal}])
 
+# Subclass of Universe used by Exh to build the universe of logical possibilities (e.g. exh.model.PackedUniverse or exh.model.StreamingUniverse to save memory, exh.model.BDDUniverse to avoid enumerating worlds, exh.model.SymmetricUniverse to keep one world per permutation of individuals)
+universe = Universe
+
+# How Exh computes maximal sets of alternatives: "universe" enumerates the worlds of the universe, "sat" uses a SAT solver.
+# "sat" only pays off when prejacent and alternatives read many bits (many predicates or large domains), so that enumerating 2 ** n worlds is out of reach ;
+# with few bits, it is much slower than "universe", as it makes solver calls for every alternative and every maximal set (e.g. nested Exh with hundreds of alternatives over 3 atoms)
+engine = "universe"
+
+# Whether Exh keeps only one alternative per class of logically equivalent alternatives
+dedup = False
+
+# Whether results of innocent exclusion and inclusion are memoized and reused by Exh objects with the same prejacent and alternatives (cf exh.cache)
+exhaust_cache = True
+
+# Directory where results of innocent exclusion and inclusion are also stored, to be reused across processes and sessions (cf exh.cache.DiskCache) ; None to keep them in memory only
+cache_dir = None
+
+# Whether Exh only enumerates the bits read by the prejacent and the alternatives, and computes maximal sets separately for groups of alternatives reading disjoint bits (cf exh.model.projection)
+project = True
+
+# Whether Exh records the time spent in every phase of its computation (cf exh.stats ; Exh(...).stats and exh.stats.session)
+profile = False
+
 # Whether Exh computes innocent inclusion by default
 ii_on = False
 
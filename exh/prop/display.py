@@ -42,6 +42,7 @@ class Display:
 			latex = options.latex_display 
 
 		if latex:
+			from IPython.display import display, Math # imported on first use: IPython is slow to import
 			display(Math(self.display(latex)))
 		else:
 			print(self.display(latex))
@@ -4,9 +4,17 @@ import itertools
 import exh.utils as utils
 import exh.model.options as options
 
+from . import plan
+
 ### EVALUATION METHODS ###			
 
 class Evaluate:
+	"""
+	Class attributes:
+		memoize (bool) -- whether the values of the formula are worth storing in a TruthCache (False for formulas that are cheap to evaluate)
+	"""
+
+	memoize = True
 	
 	def evaluate(self, **kwargs):
 		"""
@@ -21,6 +29,7 @@ class Evaluate:
 					if proposition, the value must be boolean
 					if n-ary predicate, value must be a boolean numpy array with size (options.dom_quant)^n
 			no_flattening (bool, default = False) -- prevent automatic flattening of result if the result is one-dimensional
+			cache (TruthCache, default = None)    -- memo of the values of subformulas against the same assignment (cf exh.model.cache)
 
 		Returns:
 			np.ndarray[bool] -- Boolean array of shape (n_assignment, dom_quant, ..., dom_quant) specifying for each assignment and values given to free variables
@@ -53,31 +62,60 @@ class Evaluate:
 
 			assignment = assignment[np.newaxis, :]
 
-		variables = kwargs.get("variables", dict())
-		free_vars = [var for var in kwargs.get("free_vars", self.free_vars) if var not in variables]
-		to_return = self.evaluate_aux(assignment, vm, variables = variables, free_vars = free_vars)
+		return plan.evaluate([self], **dict(kwargs, assignment = assignment, vm = vm))[0]
 
-		if all(dim == 1 for dim in to_return.shape) and not ("no_flattening" in kwargs and kwargs["no_flattening"]):
-			return to_return.item()
-		else:
-			return to_return
 
+	def evaluate_cached(self, assignment, vm, variables, free_vars, cache):
+		"""Same as evaluate_aux, looking up the result in "cache" first (if cache is not None)"""
+		if cache is None:
+			return self.evaluate_aux(assignment, vm, variables, free_vars)
+		else:
+			return cache.evaluate(self, assignment, vm, variables, free_vars)
 
-	def evaluate_aux(self, assignment, vm, variables = dict(), free_vars = list()):
+	def evaluate_aux(self, assignment, vm, variables = dict(), free_vars = list(), cache = None):
 		"""
-		Auxiliary method for recursion ; evaluates sub-formula (to be overridden by children classes)
+		Auxiliary method for recursion ; evaluates sub-formula
+		Formulas whose values derive from those of subformulas define "dependencies" and "combine" (subformulas are then evaluated through "evaluate_cached") ;
+		others (e.g. predicates) override this method.
 		
 		Arguments:
 			assignment (numpy.ndarray[bool]) -- each line specifies a different assignmen of bit positions to truth values # TODO: rename to worlds
 			vm         (VariableManager)     -- variable manager mapping predicate and variable names to bit positions
 			variables  (dict[str, int])      -- local assignment of values to variables
 			free_vars  (list[str])           -- variables left free in the matrix formula (the formula on which "evaluate" was called)
+			cache      (TruthCache)          -- memo of the values of subformulas (None if no memoization)
 		
 		Returns:
-		   np.ndarray[bool] -- Boolean array of shape (n_assignment, dom_quant, ..., dom_quant) specifying for each assignment and values given to free variables
-		                                                             <---number of free vars-->
+		   np.ndarray[bool] -- Boolean array of shape (dom_quant, ..., dom_quant, n_assignment) specifying for each values given to free variables and assignment
+		                                               <---number of free vars-->
+		                       Unlike in the output of "evaluate", assignments come last: operations on the truth-values of formulas then apply to long contiguous rows.
+		                       The caller may modify the returned array in place if it owns its data and is writeable (cf formula.owns) ;
+		                       formulas which keep a reference to the arrays they return must return read-only arrays or views (as TruthCache does).
+		"""
+		dependencies = self.dependencies(variables, free_vars)
+		if dependencies is None:
+			raise Exception("evaluate_aux is not been implemented for class {}".format(self.__class__.__name__))
+
+		return self.combine((f.evaluate_cached(assignment, vm, f_variables, f_free_vars, cache) for f, f_variables, f_free_vars in dependencies), variables, free_vars)
+
+	def dependencies(self, variables, free_vars):
+		"""
+		Returns the subformulas whose values the values of the formula are computed from (cf combine), or None if the formula is evaluated by "evaluate_aux" alone
+		(to be overridden by children classes)
+
+		Returns:
+			list[tuple[Formula, dict[str, int], list[str]]] -- triples of a subformula and the "variables" and "free_vars" to evaluate it with
+		"""
+		return None
+
+	def combine(self, values, variables, free_vars):
+		"""
+		Computes the values of the formula (as evaluate_aux) from the values of its dependencies (to be overridden by children classes which define "dependencies")
+
+		Arguments:
+			values (iterable[np.ndarray]) -- the values of the dependencies, in order ; they may be computed lazily, as they are iterated over
 		"""
-		raise Exception("evaluate_aux is not been implemented for class {}".format(self.__class__.__name__))
+		raise Exception("combine is not been implemented for class {}".format(self.__class__.__name__))
 
 
 
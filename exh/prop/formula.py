@@ -1,8 +1,8 @@
 import numpy as np
 from collections import defaultdict
 import itertools
-
-from IPython.display import Math, display, HTML
+import weakref
+import copy
 
 import exh.utils         as utils
 import exh.model.options as options
@@ -11,9 +11,36 @@ import exh.model.vars    as var
 from .simplify import IteratorType
 from .display  import Display
 from .evaluate import Evaluate
+from .symbolic import Symbolic
+
+
+class Key(tuple):
+	"""
+	Tuple whose hash is computed once ; since the key of a formula contains the keys of its children,
+	hashing it then costs as much as hashing the top-most level instead of the whole formula.
+	"""
+
+	def __new__(cls, iterable):
+		self = super(Key, cls).__new__(cls, iterable)
+		self._hash = tuple.__hash__(self)
+		return self
+
+	def __hash__(self):
+		return self._hash
+
+	def __reduce__(self):
+		# Hashes of strings differ across processes: the hash is recomputed when unpickling
+		return (Key, (tuple(self),))
 
 
-class Formula(IteratorType, Display, Evaluate): # Using sub-classing to spread code over multiple files
+class KeyProxy:
+	"""Stands for a formula whose key is "key" (cf Formula.eq_key)"""
+
+	def __init__(self, key):
+		self.key = key
+
+
+class Formula(IteratorType, Display, Evaluate, Symbolic): # Using sub-classing to spread code over multiple files
 	"""
 	Base class for fomulas
 
@@ -23,7 +50,11 @@ class Formula(IteratorType, Display, Evaluate): # Using sub-classing to spread c
 
 	Attributes:
 		children (list(Formula)) -- sub-formulas
-		vm (VariableManager)     -- organizes mapping from predicate and variables name to concrete bit position
+		vm (VariableManager)     -- organizes mapping from predicate and variables name to concrete bit position ; follows changes of options.dom_quant
+
+	Properties:
+		key (tuple)    -- hashable structural representation of the formula, computed once (cf key_aux)
+		eq_key (tuple) -- key up to the alternatives of embedded Exh, which equality and hashing disregard (cf Exh.eq_key)
 	"""
 
 	no_parenthesis = False
@@ -33,10 +64,7 @@ class Formula(IteratorType, Display, Evaluate): # Using sub-classing to spread c
 		self.subst = self.__class__.substitutable
 		self.children = children
 		self.vars()
-
-		# Free vars are lexically ordered
-		self.free_vars = list(set(var for child in self.children for var in child.free_vars)) 
-		self.free_vars.sort()
+		self.free_vars = self.free_vars_aux()
 
 	def reinitialize(self): #only used for Exh, which performs computation at initialization
 		pass
@@ -56,13 +84,91 @@ class Formula(IteratorType, Display, Evaluate): # Using sub-classing to spread c
 	def __repr__(self):
 		return self.display()
 
+	def __getstate__(self):
+		# Pickled formulas are kept compact: the VarManager and the key are recomputed when unpickling (hashes of strings differ across processes)
+		state = self.__dict__.copy()
+		for attribute in ["_vm", "_vm_dom_quant", "_key", "_key_dom_quant", "_eq_key"]:
+			state.pop(attribute, None)
+		return state
+
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self._key = None
+		self.vars()
+
+	def __copy__(self):
+		# Shallow copies keep every attribute as is (unlike pickling)
+		new = self.__class__.__new__(self.__class__)
+		new.__dict__.update(self.__dict__)
+		return new
+
 	def copy(self):
 		"""Creates copy of the object (overridden by children's classes"""
 		return Formula(*self.children)
 
 	def __eq__(self, other):
-		"""Returns true if two formulas are syntactically the same, up to constituent reordering (overridden by children classes)"""
-		return self.__class__ is other.__class__
+		"""Returns true if two formulas are syntactically the same, up to constituent reordering and to the alternatives of embedded Exh"""
+		return isinstance(other, Formula) and self.eq_key == other.eq_key
+
+	def __hash__(self):
+		return hash(self.eq_key)
+
+	@property
+	def vm(self):
+		# VarManagers depend on the sizes of domains: they are recomputed (cf vars) if the size of default domains has changed since they were computed
+		if self.__dict__.get("_vm_dom_quant") != options.dom_quant:
+			self.vars()
+		return self._vm
+
+	@vm.setter
+	def vm(self, vm):
+		self._vm           = vm
+		self._vm_dom_quant = options.dom_quant
+
+	@property
+	def children(self):
+		return self._children
+
+	@children.setter
+	def children(self, children):
+		# Changing children invalidates what was computed from them (e.g. when alternatives are built by replacing children of a copy):
+		# the key, the free variables and the VarManager (recomputed when next accessed, cf vm)
+		self._children = children
+		self._key      = None
+		if "free_vars" in self.__dict__:
+			self.free_vars = self.free_vars_aux()
+			self.__dict__.pop("_vm_dom_quant", None)
+
+	@property
+	def key(self):
+		# Keys include the sizes of domains (cf Pred and Quantifier): they are recomputed if the size of default domains has changed
+		if self._key is None or self._key_dom_quant != options.dom_quant:
+			self._key           = Key(self.key_aux())
+			self._key_dom_quant = options.dom_quant
+			self._eq_key        = None
+		return self._key
+
+	@property
+	def eq_key(self):
+		# Equality disregards the alternatives of Exh (cf Exh.eq_key), unlike the key which caches rely on: it is the key itself for formulas without Exh
+		key = self.key # recomputing the key resets the equality key
+		if self.__dict__.get("_eq_key") is None:
+			eq_keys = [child.eq_key for child in self.children]
+			if all(eq_key is child.__dict__.get("_key") for eq_key, child in zip(eq_keys, self.children)):
+				self._eq_key = key
+			else:
+				# key_aux only reads the keys of the children: it is applied to a copy whose children have their equality keys as keys
+				proxy           = copy.copy(self)
+				proxy._children = [KeyProxy(eq_key) for eq_key in eq_keys]
+				self._eq_key    = Key(proxy.key_aux())
+		return self._eq_key
+
+	def key_aux(self):
+		"""
+		Returns a tuple of strings, numbers and tuples which identifies the formula up to syntactic equality (overridden by children classes)
+		Keys of different formulas can be compared with one another, which provides a canonical order on formulas.
+		"""
+		return (self.__class__.__name__, tuple(child.key for child in self.children))
 
 
 	
@@ -112,13 +218,28 @@ class Formula(IteratorType, Display, Evaluate): # Using sub-classing to spread c
 		else:
 			return self
 
+	def free_vars_aux(self):
+		"""Returns the free variables of the formula, in lexical order (overridden by children classes)"""
+		return sorted(set(var for child in self.children for var in child.free_vars))
+
 	def vars(self):
 		"""Returns a VariableManager object for all the variables that occur in the formula"""
 
-		self.vm = var.VarManager.merge(*[c.vars() for c in self.children])
-		self.vm.linearize()
+		# Children have computed their VarManagers when they were constructed (or recompute them if options.dom_quant has changed since)
+		self.vm = var.VarManager.merge(*[c.vm for c in self.children])
 		return self.vm
 
+	def symmetric(self):
+		"""
+		Whether the truth-value of the formula is the same at two worlds that differ by a permutation of individuals (cf model.SymmetricUniverse)
+		Closed formulas are, unless they single out some individuals (e.g. quantification over part of the domain)
+		"""
+		return not self.free_vars and self.symmetric_aux()
+
+	def symmetric_aux(self):
+		"""Whether no subformula singles out individuals (overridden by children classes which do)"""
+		return all(child.symmetric_aux() for child in self.children)
+
 	@classmethod
 	def alternative_to(cls, other):
 		"""
@@ -131,6 +252,33 @@ class Formula(IteratorType, Display, Evaluate): # Using sub-classing to spread c
 
 ############### OPERATORS ##############
 
+def owns(array):
+	"""Whether "array" may be modified in place by the formula it is returned to (cf Evaluate.evaluate_aux)"""
+	return array.flags.owndata and array.flags.writeable
+
+def fold(ufunc, values):
+	"""
+	Reduces the arrays of iterable "values" with commutative binary ufunc "ufunc" (e.g. np.bitwise_and) ; arrays are broadcast against one another.
+	Results are accumulated in place, into the first array owned by the caller (cf owns) that has the shape of the result:
+	when values are computed lazily, at most two of them are in memory at once, and no array is allocated once one is owned.
+	"""
+	result = None
+
+	for value in values:
+		if result is None:
+			result = value
+			continue
+
+		shape = np.broadcast_shapes(result.shape, value.shape)
+		if owns(result) and result.shape == shape:
+			ufunc(result, value, out = result)
+		elif owns(value) and value.shape == shape:
+			result = ufunc(value, result, out = value)
+		else:
+			result = ufunc(result, value)
+
+	return result
+
 class Operator(Formula):
 	"""
 	Base class for associative operators
@@ -139,6 +287,9 @@ class Operator(Formula):
 		plain_symbol (str) -- symbol to display in plain text mode (to be overridden by children classes)
 		latex_symbol (str) -- symbol to display in LateX mode (to be overridden by children classes)
 
+	Class attributes:
+		ufunc (np.ufunc) -- binary ufunc such that fun_(stacked values) folds values with it, if any (cf fold) ; operators with the default "fun" are then evaluated without stacking the values of their children
+
 	Attributes:
 		fun (function) -- function to call on subformulas' result to get parent result
 	"""
@@ -146,14 +297,32 @@ class Operator(Formula):
 
 	plain_symbol = "op"
 	latex_symbol = "\text{op}"
+	ufunc        = None
 
 	def __init__(self, fun, *children):
 		super(Operator, self).__init__(*children)
 		self.fun = fun
+
+	def __getstate__(self):
+		state = super(Operator, self).__getstate__()
+		# The default functions of operators are lambdas, which cannot be pickled
+		if hasattr(self.__class__, "fun_") and state["fun"] is self.__class__.fun_:
+			del state["fun"]
+		return state
+
+	def __setstate__(self, state):
+		if "fun" not in state:
+			self.fun = self.__class__.fun_
+		super(Operator, self).__setstate__(state)
 						
-	def evaluate_aux(self, assignment, vm, variables = dict(), free_vars = list()):
-		"""Stacks subformulas' results and applies fun to it"""
-		return self.fun(np.stack([child.evaluate_aux(assignment, vm, variables, free_vars) for child in self.children]))
+	def dependencies(self, variables, free_vars):
+		return [(child, variables, free_vars) for child in self.children]
+
+	def combine(self, values, variables, free_vars):
+		"""Stacks subformulas' results and applies fun to it ; results are broadcast against one another, as they may not depend on the same free variables"""
+		if self.ufunc is not None and self.fun is self.__class__.fun_:
+			return fold(self.ufunc, values)
+		return self.fun(np.stack(np.broadcast_arrays(*values)))
 
 
 	def display_aux(self, latex):
@@ -174,22 +343,9 @@ class Operator(Formula):
 		else:
 			return " {type} ".format(type = symbol).join([paren(child) for child in self.children])
 
-	def __eq__(self, other):
-		if self.__class__ is other.__class__:
-			other_children = list(other.children)
-			
-			for child1 in self.children:
-					
-				matches = [i for i, child2 in enumerate(other_children) if child1 == child2]
-
-				if matches:
-					other_children.pop(matches[0])
-				else:
-					return False
-
-			return True
-		else:
-			return False
+	def key_aux(self):
+		# The order of the children does not matter: their keys are sorted
+		return (self.__class__.__name__, tuple(sorted(child.key for child in self.children)))
 
 	@classmethod
 	def alternative_to(cls, other):
@@ -200,35 +356,54 @@ class And(Operator):
 	plain_symbol = "and"
 	latex_symbol = r"\land"
 
-	fun_ = lambda array: np.min(array, axis = 0)
+	fun_  = lambda array: np.bitwise_and.reduce(array, axis = 0)
+	ufunc = np.bitwise_and
 
 	"""docstring for And"""
 	def __init__(self, *children):
 		super(And, self).__init__(And.fun_, *children)
+
+	def symbolic_aux(self, algebra, vm, variables):
+		return algebra.conj([child.symbolic_aux(algebra, vm, variables) for child in self.children])
 		
 
 class Or(Operator):
 	plain_symbol = "or"
 	latex_symbol = r"\lor"
 	
-	fun_ = lambda array: np.max(array, axis = 0)
+	fun_  = lambda array: np.bitwise_or.reduce(array, axis = 0)
+	ufunc = np.bitwise_or
 
 	"""docstring for Or"""
 	def __init__(self, *children):
 		super(Or, self).__init__(Or.fun_, *children)
+
+	def symbolic_aux(self, algebra, vm, variables):
+		return algebra.disj([child.symbolic_aux(algebra, vm, variables) for child in self.children])
 		
 class Not(Operator):
 	no_parenthesis = True
+	memoize        = False # a negation costs as much as a cache lookup ; its child is memoized
 
 	plain_symbol = "not"
 	latex_symbol = r"\neg"
 
-	fun_ = lambda x: np.squeeze(np.logical_not(x), axis = 0)
+	fun_ = lambda x: np.invert(x[0])
 
 	"""docstring for Not"""
 	def __init__(self, child):
 		super(Not, self).__init__(Not.fun_, child)
 
+	def combine(self, values, variables, free_vars):
+		if self.fun is not Not.fun_:
+			return super(Not, self).combine(values, variables, free_vars)
+
+		value, = values
+		return np.invert(value, out = value) if owns(value) else np.invert(value)
+
+	def symbolic_aux(self, algebra, vm, variables):
+		return algebra.neg(self.children[0].symbolic_aux(algebra, vm, variables))
+
 
 
 
@@ -236,11 +411,16 @@ class Not(Operator):
 
 class Truth(Formula):
 	"""docstring for Truth"""
+	memoize = False
+
 	def __init__(self):
 		super(Truth, self).__init__()
 
-	def evaluate_aux(self, assignment, vm, variables = dict(), free_vars = list()):
-		return np.ones(assignment.shape[0], dtype = "bool")
+	def evaluate_aux(self, assignment, vm, variables = dict(), free_vars = list(), cache = None):
+		return np.invert(np.zeros((1,) * len(free_vars) + (assignment.shape[0],), dtype = assignment.dtype))
+
+	def symbolic_aux(self, algebra, vm, variables):
+		return algebra.true()
 
 	def display_aux(self, latex):
 		if latex:
@@ -251,11 +431,16 @@ class Truth(Formula):
 
 class Falsity(Formula):
 	"""docstring for Falsity"""
+	memoize = False
+
 	def __init__(self):
 		super(Falsity, self).__init__()
 
-	def evaluate_aux(self, assignment, vm, variables = dict(), free_vars = list()):
-		return np.zeros(assignment.shape[0], dtype = "bool")
+	def evaluate_aux(self, assignment, vm, variables = dict(), free_vars = list(), cache = None):
+		return np.zeros((1,) * len(free_vars) + (assignment.shape[0],), dtype = assignment.dtype)
+
+	def symbolic_aux(self, algebra, vm, variables):
+		return algebra.false()
 
 	def display_aux(self, latex):
 		if latex:
@@ -264,16 +449,53 @@ class Falsity(Formula):
 			return "true"
 
 class Named(Formula):
+	memoize = False
+
 	def __init__(self, name, child, latex_name = None):
 		super(Named, self).__init__(child)
 		self.name       = name
 		self.latex_name = latex_name if latex_name is not None else self.name
 
-	def evaluate_aux(self, *args, **kwargs):
-		return self.children[0].evaluate_aux(*args, **kwargs)
+	def dependencies(self, variables, free_vars):
+		return [(self.children[0], variables, free_vars)]
+
+	def combine(self, values, variables, free_vars):
+		value, = values
+		return value
+
+	def key_aux(self):
+		return (self.__class__.__name__, self.name, self.children[0].key)
+
+	def symbolic_aux(self, *args, **kwargs):
+		return self.children[0].symbolic_aux(*args, **kwargs)
 
 	def display_aux(self, latex):
 		if latex:
 			return self.latex_name
 		else:
 			return self.name
+
+
+
+############### HASH-CONSING ########
+
+# Maps keys to the canonical formula with that key ; formulas are forgotten when no longer used
+interned = weakref.WeakValueDictionary()
+
+def hashcons(f):
+	"""
+	Returns the canonical formula syntactically equal to f, so that equal (sub)formulas are one and the same object.
+	Formulas passed as argument are never modified: a copy is made if some of their children must be replaced by canonical formulas.
+	"""
+	try:
+		return interned[f.key]
+	except KeyError:
+		pass
+
+	children = [hashcons(child) for child in f.children]
+	if any(new is not old for new, old in zip(children, f.children)):
+		f = copy.copy(f)
+		f.children = tuple(children)
+
+	interned[f.key] = f
+	return f
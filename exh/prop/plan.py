@@ -0,0 +1,172 @@
+"""
+Compilation of a batch of formulas into a flat evaluation plan.
+Every distinct subformula of the batch (evaluated with given values of variables and free variables) becomes one instruction,
+whose result is stored in a register ; instructions are sorted so that the registers they read are computed first.
+A plan is executed by a single loop over its instructions, which frees registers as soon as they are no longer needed.
+"""
+import numpy as np
+
+from exh.model.cache import TruthCache
+
+
+class Plan:
+	"""
+	Flat evaluation plan of formulas (cf module documentation)
+
+	Attributes:
+		instructions (list[tuple]) -- the i-th instruction (formula, variables, free_vars, inputs) computes the values of "formula" into register i
+		                              from registers "inputs" (cf Formula.combine) ; "inputs" is None if the formula is evaluated as a whole (cf Formula.dependencies)
+		keys         (list[tuple]) -- keys identifying the values of every instruction (cf TruthCache.key)
+		outputs      (list[int])   -- registers holding the values of the formulas of the batch
+		last_use     (list[int])   -- index of the last instruction reading each register (len(instructions) for outputs)
+	"""
+
+	def __init__(self, fs, variables = dict(), free_vars = None):
+		"""
+		Arguments:
+			fs        (list[Formula])   -- the formulas to evaluate
+			variables (dict[str, int])  -- values given to variables
+			free_vars (list[list[str]]) -- the free variables of every formula (default: those of the formula not in "variables")
+		"""
+		if free_vars is None:
+			free_vars = [[var for var in f.free_vars if var not in variables] for f in fs]
+
+		self.instructions = []
+		self.keys         = []
+		registers         = dict() # maps keys to registers
+
+		def compile(f, f_variables, f_free_vars):
+			"""Adds the instructions of f and of its dependencies to the plan, and returns the register of f"""
+			# Instructions are added in post-order, with an explicit stack rather than recursion
+			stack = [(f, f_variables, f_free_vars, None)]
+
+			while True:
+				g, g_variables, g_free_vars, inputs = stack.pop()
+				key = TruthCache.key(g, g_variables, g_free_vars)
+
+				if key not in registers:
+					dependencies = g.dependencies(g_variables, g_free_vars)
+
+					if inputs is None and dependencies is not None:
+						# The dependencies are compiled first ; g is then revisited with their registers
+						stack.append((g, g_variables, g_free_vars, []))
+						stack.extend((d, d_variables, d_free_vars, None) for d, d_variables, d_free_vars in reversed(dependencies))
+						continue
+
+					registers[key] = len(self.instructions)
+					self.instructions.append((g, g_variables, g_free_vars, inputs))
+					self.keys.append(key)
+
+				if not stack:
+					return registers[key]
+
+				# The register of g is an input of the formula below it on the stack
+				stack[-1 - next(i for i, frame in enumerate(reversed(stack)) if frame[3] is not None)][3].append(registers[key])
+
+		self.outputs  = [compile(f, variables, f_free_vars) for f, f_free_vars in zip(fs, free_vars)]
+		self.last_use = [-1] * len(self.instructions)
+
+		for i, (_, _, _, inputs) in enumerate(self.instructions):
+			for register in inputs or []:
+				self.last_use[register] = i
+		for register in self.outputs:
+			self.last_use[register] = len(self.instructions)
+
+	def __len__(self):
+		return len(self.instructions)
+
+	def execute(self, assignment, vm, cache = None):
+		"""
+		Evaluates the formulas of the plan against "assignment" (cf Formula.evaluate_aux) ;
+		values of instructions are looked up in (and stored into) "cache", if provided, for formulas worth memoizing
+
+		Returns:
+			list[np.ndarray] -- the values of the formulas of the batch, in the format of evaluate_aux
+		"""
+		registers = [None] * len(self.instructions)
+		viewed    = [False] * len(self.instructions) # whether some instruction was given a view of the register (and may have kept it, e.g. Named)
+		cached    = self.lookup(cache) if cache is not None else dict()
+
+		for i in self.needed(cached):
+			f, variables, free_vars, inputs = self.instructions[i]
+
+			if i in cached:
+				value = cached[i]
+			elif inputs is None:
+				value = f.evaluate_cached(assignment, vm, variables, free_vars, cache)
+			else:
+				# A register read for the last time (and only once), which no earlier instruction holds a view of, may be modified in place by "combine" (cf formula.owns) ;
+				# others are passed as views
+				handed_over = [self.last_use[j] == i and inputs.count(j) == 1 and not viewed[j] for j in inputs]
+				for j, raw in zip(inputs, handed_over):
+					viewed[j] = viewed[j] or not raw
+
+				value = f.combine([registers[j] if raw else registers[j].view() for j, raw in zip(inputs, handed_over)], variables, free_vars)
+
+				if cache is not None and f.memoize:
+					cache.put(self.keys[i], value)
+
+			registers[i] = value
+			for j in inputs or []:
+				if self.last_use[j] == i:
+					registers[j] = None
+
+		return [registers[i] for i in self.outputs]
+
+	def lookup(self, cache):
+		"""Returns the values of the instructions (computed from dependencies) found in cache, by instruction"""
+		cached = dict()
+		for i in self.needed(cached, cache):
+			if self.instructions[i][0].memoize and self.instructions[i][3] is not None:
+				value = cache.get(self.keys[i])
+				if value is not None:
+					cached[i] = value
+		return cached
+
+	def needed(self, cached, cache = None):
+		"""
+		Returns the instructions needed to compute the outputs, in order: dependencies of instructions found in "cached" are not needed
+		If "cache" is provided, instructions whose values are in "cache" are not expanded either (without counting lookups).
+		"""
+		needed = [False] * len(self.instructions)
+		stack  = list(self.outputs)
+
+		while stack:
+			i = stack.pop()
+			if needed[i]:
+				continue
+			needed[i] = True
+
+			inputs = self.instructions[i][3]
+			if i in cached or inputs is None or (cache is not None and self.instructions[i][0].memoize and self.keys[i] in cache.entries):
+				continue
+			stack.extend(inputs)
+
+		return [i for i, is_needed in enumerate(needed) if is_needed]
+
+
+def evaluate(fs, **kwargs):
+	"""
+	Evaluates formulas fs at once, through a Plan ; same keyword arguments as Formula.evaluate
+
+	Returns:
+		list -- the values of every formula, as returned by Formula.evaluate
+	"""
+	assignment = kwargs["assignment"]
+	vm         = kwargs["vm"]
+	if len(assignment.shape) == 1:
+		assignment = assignment[np.newaxis, :]
+
+	variables = kwargs.get("variables", dict())
+	free_vars = [[var for var in kwargs.get("free_vars", f.free_vars) if var not in variables] for f in fs]
+	values    = Plan(fs, variables, free_vars).execute(assignment, vm, kwargs.get("cache"))
+
+	results = []
+	for value in values:
+		value = np.moveaxis(value, -1, 0) # assignments come first in the output, last in evaluate_aux
+
+		if all(dim == 1 for dim in value.shape) and not kwargs.get("no_flattening", False):
+			results.append(value.item())
+		else:
+			results.append(value)
+	return results
@@ -21,6 +21,7 @@ class Pred(Formula):
 	"""
 
 	no_parenthesis = True
+	memoize        = False # values are read directly from the assignment
 	last_index     = 100 # leaving some offset
 
 	def __init__(self, index = None, name = None, depends = None, domains = None):
@@ -44,8 +45,6 @@ class Pred(Formula):
 
 		super(Pred, self).__init__()
 
-		self.free_vars = self.free_vars_
-
 	@property
 	def free_vars_(self):
 		return sorted(set(self.deps))
@@ -69,7 +68,7 @@ class Pred(Formula):
 			return self.name + dep_string
 
 	# @profile
-	def evaluate_aux(self, assignment, vm, variables = dict(), free_vars = list()):
+	def evaluate_aux(self, assignment, vm, variables = dict(), free_vars = list(), cache = None):
 		# Not necessary to split by "free_vars", the empty case is just a special case
 		# The split avoids generalizing to the worst case.
 		if not free_vars: 
@@ -82,38 +81,35 @@ class Pred(Formula):
 		else:
 			""" 
 			P(x, y, z)
-			The value of some of these variables are provided by assignment, others are left free
+			The value of some of these variables are provided by "variables", others are left free.
+			The bit positions for all values of the free variables are computed at once, in an array with one axis per free variable ;
+			axes of free variables that the predicate does not depend on have size 1 (so that results broadcast against one another)
+			Assignments come last (cf Evaluate.evaluate_aux)
 			"""
-			raise NotImplementedError
-			shape_output           = tuple(options.dom_quant for _ in free_vars)
-			vars_not_in_assignment = set(self.deps).difference(set(variables.keys()))
-
-			position_free_vars = np.full(len(free_vars), False)
-			for dep in vars_not_in_assignment: 
-				position_free_vars[free_vars.index(dep)] = True #Potential for exception if free_vars is misconfigured
+			shape       = [1] * len(free_vars)
+			value_slots = []
 
-			value_slots    = np.full(len(self.deps), 0,     dtype = "int") 
-			mask_free_vars = np.full(len(self.deps), False, dtype = "bool") 
-
-			for i, dep in enumerate(self.deps):
+			for dep, size in zip(self.deps, vm.preds[self.idx]):
 				if dep in variables:
-					value_slots[i]    = variables[dep]
+					value_slots.append(variables[dep])
+				elif dep in free_vars:
+					axis        = free_vars.index(dep)
+					shape[axis] = size
+					value_slots.append(np.arange(size).reshape([size if i == axis else 1 for i in range(len(free_vars))]))
 				else:
-					mask_free_vars[i] = True
-
-			output = np.full((len(assignment), *shape_output), True, dtype = "bool")
-
-			for indices in np.ndindex(shape_output):
-				value_slots[mask_free_vars] = np.array(indices)[position_free_vars]
-				indexing                    = slice(len(assignment)), *indices
-				output[indexing]            = assignment[:, vm.index(self.idx, value_slots)]
-
-			return output
+					raise Exception("Predicate {} cannot be evaluated b/c no value for free variable {} was provided".format(self.name, dep))
 
+			return assignment.T[np.reshape(vm.index(self.idx, value_slots), shape)]
 
 
 
+	def symbolic_aux(self, algebra, vm, variables):
+		try:
+			value_slots = [variables[dep] for dep in self.deps]
+		except KeyError as e:
+			raise Exception("Predicate {} cannot be compiled b/c no value for free variable {} was provided".format(self.name, e))
 
+		return algebra.atom(vm.index(self.idx, value_slots))
 
 	def __call__(self, *variables):
 		if len(variables) == self.arity:
@@ -122,20 +118,23 @@ class Pred(Formula):
 			print("""WARNING: {} variables were provided than the predicate {} depends on ; changing the arity of the predicate to {}. Universe objects will need to be recreated."""
 			      .format("More" if len(variables) > self.arity else "Less", self.name, len(variables)))
 			self.depends(*variables)
-			self.vars() # Recompute variable manager
 			self.free_vars = self.free_vars_
 			return self
 
-	def __eq__(self, other):
-		return super(Pred, self).__eq__(other) and self.idx == other.idx
+	def free_vars_aux(self):
+		return self.free_vars_
+
+	def key_aux(self):
+		# Predicates applied to different variables, or ranging over domains of different sizes, are different formulas ; names do not matter
+		return (self.__class__.__name__, self.idx, tuple(self.deps), tuple(domain.n for domain in self.domains))
 
 	def vars(self):
 		size_domains = [domain.n for domain in self.domains]
 
 		if self.name is None:
-			self.vm = var.VarManager({self.idx: size_domains})
+			self.vm = var.VarManager.get({self.idx: size_domains})
 		else:
-			self.vm = var.VarManager({self.idx: size_domains}, names = {self.name: self.idx})
+			self.vm = var.VarManager.get({self.idx: size_domains}, names = {self.name: self.idx})
 
 		return self.vm
 
@@ -153,3 +152,7 @@ class Pred(Formula):
 		if domains is None:
 			domains = [var.default_domain for _ in self.deps]
 		self.domains = domains
+		self._key    = None
+
+		# Formulas do not recompute the VarManagers of their children: the VarManager must be up-to-date
+		self.vars()
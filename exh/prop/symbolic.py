@@ -0,0 +1,107 @@
+### SYMBOLIC COMPILATION METHODS ###
+
+class Symbolic:
+	"""
+	Compiles formulas into an arbitrary boolean algebra (e.g. clauses for a SAT solver, binary decision diagrams)
+	rather than evaluating them against explicit worlds.
+	"""
+
+	def symbolic(self, algebra, vm = None, variables = None):
+		"""
+		Arguments:
+			algebra   (Algebra)        -- the boolean algebra to compile the formula into
+			vm        (VarManager)     -- a variable manager for the variables in the formula (default: self.vm)
+			variables (dict[str, int]) -- values for the free variables of the formula
+
+		Returns:
+			a node of "algebra" denoting the formula, whose atoms are the bit positions of vm
+		"""
+		if vm is None:
+			vm = self.vm
+
+		if variables is None:
+			variables = dict()
+
+		return self.symbolic_aux(algebra, vm, variables)
+
+	def bits(self, vm = None, variables = None):
+		"""
+		Returns the sorted list of the bit positions of vm which the formula reads (its cone of influence), with values "variables" of its free variables ;
+		the truth-value of the formula does not depend on the other bits (cf Support)
+		"""
+		return sorted(self.symbolic(Support(), vm, variables))
+
+	def symbolic_aux(self, algebra, vm, variables):
+		"""Auxiliary method for recursion (to be overridden by children classes)"""
+		raise Exception("symbolic_aux is not been implemented for class {}".format(self.__class__.__name__))
+
+
+
+class Algebra:
+	"""
+	Abstract base class for the boolean algebras formulas compile into (cf Symbolic).
+	Children classes must implement "true", "false", "atom", "neg", "conj" and "disj" ; "at_least" is derived from them.
+	"""
+
+	def true(self):
+		raise Exception("true is not been implemented for class {}".format(self.__class__.__name__))
+
+	def false(self):
+		raise Exception("false is not been implemented for class {}".format(self.__class__.__name__))
+
+	def atom(self, bit):
+		"""Node for the truth-value of the bit at position "bit" """
+		raise Exception("atom is not been implemented for class {}".format(self.__class__.__name__))
+
+	def neg(self, x):
+		raise Exception("neg is not been implemented for class {}".format(self.__class__.__name__))
+
+	def conj(self, xs):
+		raise Exception("conj is not been implemented for class {}".format(self.__class__.__name__))
+
+	def disj(self, xs):
+		raise Exception("disj is not been implemented for class {}".format(self.__class__.__name__))
+
+	def at_least(self, xs, k):
+		"""Node which is true iff at least k of the nodes xs are true (sequential counter)"""
+		if k <= 0:
+			return self.true()
+		if k > len(xs):
+			return self.false()
+
+		# counts[j] is true iff at least j of the nodes seen so far are true
+		counts = [self.true()] + [self.false()] * k
+		for x in xs:
+			counts = [counts[0]] + [self.disj([counts[j], self.conj([counts[j - 1], x])]) for j in range(1, k + 1)]
+
+		return counts[k]
+
+
+
+class Support(Algebra):
+	"""
+	Algebra whose nodes are the sets of bits that a formula reads: every operation returns the union of the sets of its arguments.
+	Compiling a formula into it (cf Symbolic.bits) gives the bits its truth-value may depend on ;
+	e.g. predicates applied to constants, or quantifiers restricted to some individuals (cf exts.subdomain), only read some of the bits of the predicate.
+	"""
+
+	def true(self):
+		return frozenset()
+
+	def false(self):
+		return frozenset()
+
+	def atom(self, bit):
+		return frozenset([int(bit)])
+
+	def neg(self, x):
+		return x
+
+	def conj(self, xs):
+		return frozenset().union(*xs)
+
+	def disj(self, xs):
+		return frozenset().union(*xs)
+
+	def at_least(self, xs, k):
+		return frozenset().union(*xs) if 0 < k <= len(xs) else frozenset()
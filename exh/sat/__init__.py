@@ -0,0 +1,102 @@
+"""
+This module computes maximal consistent sets of formulas with a SAT solver, without enumerating worlds.
+The formulas are compiled to clauses (cf encoding.py) ; the size of the problem grows with the size of the formulas, rather than exponentially with the number of bits.
+Conversely, the number of solver calls grows with the number of propositions and of maximal sets: with few bits, enumerating worlds (cf exh.model.Universe) is much faster.
+"""
+import numpy as np
+
+from .solver   import Solver
+from .encoding import Encoder
+
+
+def consistent(*fs, vm = None, variables = None):
+	"""Checks whether formulas fs are jointly satisfiable"""
+	solver  = Solver()
+	encoder = Encoder(solver)
+
+	for f in fs:
+		solver.add_clause([encoder.encode(f, vm if vm is not None else f.vm, variables)])
+
+	return solver.solve()
+
+def find_maximal_sets(constraints, props, vm, variables = None):
+	"""
+	Returns the maximal sets of propositions "props" that are consistent with one another and with formulas "constraints"
+
+	Algorithm:
+	each proposition gets a selector variable which, when true, forces the proposition to be true.
+	Repeatedly, find an assignment not covered by previous maximal sets, then grow the set of propositions it makes true into a maximal set by adding propositions one by one.
+	Clauses ensure that any new set contains a proposition outside of every maximal set found so far.
+
+	Arguments:
+		constraints (list[Formula]) -- formulas that must be true
+		props       (list[Formula]) -- set of propositions to compute the maximal sets of
+		vm          (VarManager)    -- variable manager for constraints and propositions
+		variables   (dict)          -- values for the free variables
+
+	Returns:
+		np.array[bool]           -- returned_value[i, j] is True iff i-th maximal set contains j-th proposition (no row if the constraints are inconsistent)
+	"""
+	solver  = Solver()
+	encoder = Encoder(solver)
+
+	for f in constraints:
+		solver.add_clause([encoder.encode(f, vm, variables)])
+
+	lits      = [encoder.encode(f, vm, variables) for f in props]
+	selectors = [solver.new_var() for _ in props]
+	for lit, selector in zip(lits, selectors):
+		solver.add_clause([-selector, lit])
+
+	maximal_sets = []
+
+	while solver.solve():
+		current = [solver.model_value(lit) for lit in lits]
+
+		# Grow the set into a maximal one
+		for i in range(len(props)):
+			if not current[i]:
+				assumptions = [selector for selector, included in zip(selectors, current) if included] + [selectors[i]]
+				if solver.solve(assumptions):
+					current = [solver.model_value(lit) for lit in lits]
+
+		maximal_sets.append(current)
+
+		# Any further maximal set must contain a proposition outside of this one
+		if not solver.add_clause([selector for selector, included in zip(selectors, current) if not included]):
+			break
+
+	return np.array(maximal_sets, dtype = "bool").reshape(len(maximal_sets), len(props))
+
+def entailment_matrix(fs, vm, variables = None):
+	"""
+	Returns the entailment relation between formulas fs, as a boolean matrix: returned_value[i, j] is True iff fs[i] entails fs[j]
+
+	Algorithm:
+	every formula is encoded once ; fs[i] entails fs[j] iff fs[i] and the negation of fs[j] are jointly unsatisfiable, which is decided under assumptions.
+	A model found for a pair (i, j) is a counter-example to every other pair (k, l) such that fs[k] is true and fs[l] false in it: these pairs are not tested.
+
+	Arguments:
+		fs        (list[Formula]) -- formulas to compare
+		vm        (VarManager)    -- variable manager for the formulas
+		variables (dict)          -- values for the free variables
+
+	Returns:
+		np.array[bool]           -- returned_value[i, j] is True iff fs[i] entails fs[j]
+	"""
+	solver  = Solver()
+	encoder = Encoder(solver)
+
+	lits    = [encoder.encode(f, vm, variables) for f in fs]
+	entails = np.ones((len(fs), len(fs)), dtype = "bool")
+
+	for i in range(len(fs)):
+		for j in range(len(fs)):
+			if i == j or not entails[i, j]:
+				continue
+
+			if solver.solve([lits[i], -lits[j]]):
+				values   = np.array([solver.model_value(lit) for lit in lits], dtype = "bool")
+				entails &= ~np.outer(values, ~values)
+
+	return entails
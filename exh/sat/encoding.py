@@ -0,0 +1,69 @@
+"""
+Tseitin encoding of formulas into clauses: every subformula is mapped to a literal of a Solver,
+along with clauses forcing the literal to be equivalent to the subformula.
+"""
+from exh.prop.symbolic import Algebra
+
+
+class Encoder(Algebra):
+	"""
+	Algebra whose nodes are literals of a Solver
+
+	Attributes:
+		solver (Solver)          -- solver to which clauses are added
+		atoms  (dict[int, int])  -- maps bit positions to solver variables
+		gates  (dict)            -- maps conjunctions already encoded to their literals (structural sharing)
+	"""
+
+	def __init__(self, solver):
+		self.solver = solver
+		self.atoms  = dict()
+		self.gates  = dict()
+
+		self.true_lit = solver.new_var()
+		solver.add_clause([self.true_lit])
+
+	def true(self):
+		return self.true_lit
+
+	def false(self):
+		return -self.true_lit
+
+	def atom(self, bit):
+		if bit not in self.atoms:
+			self.atoms[bit] = self.solver.new_var()
+		return self.atoms[bit]
+
+	def neg(self, x):
+		return -x
+
+	def conj(self, xs):
+		lits = set()
+
+		for x in xs:
+			if x == self.false() or -x in lits:
+				return self.false()
+			elif x != self.true():
+				lits.add(x)
+
+		if not lits:
+			return self.true()
+		elif len(lits) == 1:
+			return lits.pop()
+
+		key = frozenset(lits)
+		if key not in self.gates:
+			y = self.solver.new_var()
+			for x in lits:
+				self.solver.add_clause([-y, x])
+			self.solver.add_clause([y] + [-x for x in lits])
+			self.gates[key] = y
+
+		return self.gates[key]
+
+	def disj(self, xs):
+		return -self.conj([-x for x in xs])
+
+	def encode(self, f, vm, variables = None):
+		"""Returns the literal equivalent to formula f"""
+		return f.symbolic(self, vm = vm, variables = variables)
@@ -0,0 +1,325 @@
+"""
+A small pure-Python CDCL SAT solver (conflict-driven clause learning, in the style of MiniSat).
+
+Literals follow the DIMACS convention: variables are positive integers, literal -v is the negation of literal v.
+Features: two-watched-literal propagation, first-UIP clause learning, VSIDS decision heuristic with phase saving, Luby restarts,
+incremental solving under assumptions.
+"""
+import heapq
+
+
+def luby(i):
+	"""i-th element (starting at 0) of the Luby sequence 1 1 2 1 1 2 4 1 1 2 ..."""
+	size, exponent = 1, 0
+	while size < i + 1:
+		exponent += 1
+		size      = 2 * size + 1
+
+	while size - 1 != i:
+		size      = (size - 1) // 2
+		exponent -= 1
+		i         = i % size
+
+	return 2 ** exponent
+
+
+class Solver:
+	"""
+	Attributes:
+		n_vars  (int)       -- number of variables created so far
+		ok      (bool)      -- False if the clauses added so far are known to be unsatisfiable
+		model   (list[int]) -- after a successful call to "solve", model[v] is 1 if variable v is true, -1 if it is false
+		n_conflicts (int)   -- total number of conflicts encountered
+	"""
+
+	restart_unit = 100
+	var_decay    = 0.95
+
+	def __init__(self):
+		self.n_vars = 0
+		self.ok     = True
+		self.model  = None
+		self.n_conflicts = 0
+
+		# Per variable information (index 0 is unused)
+		self.assigns  = [0]
+		self.level    = [0]
+		self.reason   = [None]
+		self.activity = [0.]
+		self.polarity = [False]
+		self.seen     = [False]
+
+		# watches[self.code(lit)] : clauses in which lit is one of the first two literals
+		self.watches  = [[], []]
+
+		self.trail     = []
+		self.trail_lim = []
+		self.qhead     = 0
+
+		self.heap    = []
+		self.var_inc = 1.
+
+	@staticmethod
+	def code(lit):
+		return 2 * lit if lit > 0 else - 2 * lit + 1
+
+	def new_var(self):
+		self.n_vars += 1
+		self.assigns.append(0)
+		self.level.append(0)
+		self.reason.append(None)
+		self.activity.append(0.)
+		self.polarity.append(False)
+		self.seen.append(False)
+		self.watches.extend(([], []))
+		heapq.heappush(self.heap, (0., self.n_vars))
+		return self.n_vars
+
+	def value(self, lit):
+		"""1 if lit is true under the current assignment, -1 if false, 0 if unassigned"""
+		return self.assigns[lit] if lit > 0 else -self.assigns[-lit]
+
+	def model_value(self, lit):
+		"""Truth-value of lit in the model found by the last successful call to "solve" """
+		return self.model[lit] > 0 if lit > 0 else self.model[-lit] < 0
+
+	@property
+	def decision_level(self):
+		return len(self.trail_lim)
+
+
+
+	### CLAUSES ###
+
+	def add_clause(self, lits):
+		"""Adds a clause (list of literals) ; returns False if the set of clauses has become unsatisfiable"""
+		if not self.ok:
+			return False
+
+		self.cancel_until(0)
+
+		clause = []
+		for lit in set(lits):
+			if -lit in clause or self.value(lit) > 0: # clause is a tautology or already satisfied
+				return True
+			elif self.value(lit) == 0:
+				clause.append(lit)
+
+		if not clause:
+			self.ok = False
+		elif len(clause) == 1:
+			self.enqueue(clause[0], None)
+			self.ok = self.propagate() is None
+		else:
+			self.attach(clause)
+
+		return self.ok
+
+	def attach(self, clause):
+		self.watches[self.code(clause[0])].append(clause)
+		self.watches[self.code(clause[1])].append(clause)
+
+
+
+	### SEARCH ###
+
+	def enqueue(self, lit, reason):
+		var = abs(lit)
+		self.assigns[var] = 1 if lit > 0 else -1
+		self.level[var]   = self.decision_level
+		self.reason[var]  = reason
+		self.trail.append(lit)
+
+	def cancel_until(self, level):
+		if self.decision_level > level:
+			for lit in self.trail[self.trail_lim[level]:]:
+				var = abs(lit)
+				self.assigns[var]  = 0
+				self.reason[var]   = None
+				self.polarity[var] = lit > 0
+				heapq.heappush(self.heap, (-self.activity[var], var))
+
+			del self.trail[self.trail_lim[level]:]
+			del self.trail_lim[level:]
+			self.qhead = len(self.trail)
+
+	def propagate(self):
+		"""Performs unit propagation ; returns a conflicting clause if any, None otherwise"""
+		while self.qhead < len(self.trail):
+			false_lit = -self.trail[self.qhead]
+			self.qhead += 1
+
+			watchers = self.watches[self.code(false_lit)]
+			kept     = []
+
+			for i, clause in enumerate(watchers):
+				# Making sure the false literal is clause[1]
+				if clause[0] == false_lit:
+					clause[0], clause[1] = clause[1], clause[0]
+
+				if self.value(clause[0]) > 0:
+					kept.append(clause)
+					continue
+
+				# Looking for a new literal to watch
+				for k in range(2, len(clause)):
+					if self.value(clause[k]) >= 0:
+						clause[1], clause[k] = clause[k], clause[1]
+						self.watches[self.code(clause[1])].append(clause)
+						break
+				else:
+					kept.append(clause)
+
+					if self.value(clause[0]) < 0: # conflict
+						kept.extend(watchers[i + 1:])
+						self.watches[self.code(false_lit)] = kept
+						return clause
+					else:                         # unit clause
+						self.enqueue(clause[0], clause)
+
+			self.watches[self.code(false_lit)] = kept
+
+		return None
+
+	def analyze(self, conflict):
+		"""First-UIP conflict analysis ; returns the learnt clause (asserting literal first) and the level to backtrack to"""
+		learnt  = [None]
+		counter = 0
+		lit     = None
+		index   = len(self.trail) - 1
+		clause  = conflict
+
+		while True:
+			for q in (clause if lit is None else clause[1:]):
+				var = abs(q)
+
+				if not self.seen[var] and self.level[var] > 0:
+					self.seen[var] = True
+					self.bump(var)
+
+					if self.level[var] >= self.decision_level:
+						counter += 1
+					else:
+						learnt.append(q)
+
+			# Next literal of the current level to look at
+			while not self.seen[abs(self.trail[index])]:
+				index -= 1
+
+			lit     = self.trail[index]
+			index  -= 1
+			clause  = self.reason[abs(lit)]
+			self.seen[abs(lit)] = False
+			counter -= 1
+
+			if counter == 0:
+				break
+
+		learnt[0] = -lit
+		for q in learnt[1:]:
+			self.seen[abs(q)] = False
+
+		if len(learnt) == 1:
+			return learnt, 0
+
+		# The literal with the highest level is watched in second position
+		i_max = max(range(1, len(learnt)), key = lambda i: self.level[abs(learnt[i])])
+		learnt[1], learnt[i_max] = learnt[i_max], learnt[1]
+		return learnt, self.level[abs(learnt[1])]
+
+	def bump(self, var):
+		self.activity[var] += self.var_inc
+
+		if self.activity[var] > 1e100:
+			self.activity = [act * 1e-100 for act in self.activity]
+			self.var_inc *= 1e-100
+			self.heap     = [(-self.activity[v], v) for v in range(1, self.n_vars + 1) if self.assigns[v] == 0]
+			heapq.heapify(self.heap)
+		elif self.assigns[var] == 0:
+			heapq.heappush(self.heap, (-self.activity[var], var))
+
+	def pick_branching_var(self):
+		while self.heap:
+			_, var = heapq.heappop(self.heap)
+			if self.assigns[var] == 0:
+				return var
+		return None
+
+	def search(self, max_conflicts, assumptions):
+		"""Returns True (SAT), False (UNSAT) or None (restart)"""
+		conflicts = 0
+
+		while True:
+			conflict = self.propagate()
+
+			if conflict is not None:
+				self.n_conflicts += 1
+				conflicts        += 1
+
+				if self.decision_level == 0:
+					self.ok = False
+					return False
+
+				learnt, level = self.analyze(conflict)
+				self.cancel_until(level)
+
+				if len(learnt) == 1:
+					self.enqueue(learnt[0], None)
+				else:
+					self.attach(learnt)
+					self.enqueue(learnt[0], learnt)
+
+				self.var_inc /= self.var_decay
+
+			else:
+				if conflicts >= max_conflicts:
+					self.cancel_until(0)
+					return None
+
+				# Assumptions are the first decisions
+				next_lit = None
+				while self.decision_level < len(assumptions):
+					lit = assumptions[self.decision_level]
+
+					if self.value(lit) > 0:
+						self.trail_lim.append(len(self.trail)) # dummy decision level
+					elif self.value(lit) < 0:
+						return False
+					else:
+						next_lit = lit
+						break
+
+				if next_lit is None:
+					var = self.pick_branching_var()
+
+					if var is None:
+						return True
+					next_lit = var if self.polarity[var] else -var
+
+				self.trail_lim.append(len(self.trail))
+				self.enqueue(next_lit, None)
+
+	def solve(self, assumptions = []):
+		"""
+		Checks whether the clauses, along with literals "assumptions", are satisfiable
+		If so, the satisfying assignment is stored in "model"
+		"""
+		self.model = None
+		if not self.ok:
+			return False
+
+		self.cancel_until(0)
+
+		i_restart = 0
+		while True:
+			status = self.search(luby(i_restart) * self.restart_unit, list(assumptions))
+			i_restart += 1
+
+			if status is not None:
+				break
+
+		if status:
+			self.model = list(self.assigns)
+
+		self.cancel_until(0)
+		return status
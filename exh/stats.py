@@ -0,0 +1,85 @@
+"""
+Instrumentation of exhaustification: time spent in every phase of the computation (alternatives, universe construction, evaluation, maximal sets...),
+sizes of the arrays involved and counters (worlds, alternatives, maximal sets).
+Recording is opt-in (cf options.profile) ; the statistics of every Exhaust object are also aggregated in "session".
+"""
+import time
+from contextlib import contextmanager
+
+
+class Stats:
+	"""
+	Statistics of one or several exhaustifications ; phases may be nested (e.g. "excl" includes the "filter", "evaluate" and "maximal_rows" phases of innocent exclusion)
+
+	Attributes:
+		enabled  (bool)            -- whether anything is recorded
+		phases   (dict[str, dict]) -- maps every phase to its total wall time "time" (in seconds), its number of occurrences "calls" and the size of the largest array it produced "peak_bytes"
+		counters (dict[str, int])  -- e.g. "worlds", "alternatives", "maximal sets (excl)"
+	"""
+
+	def __init__(self, enabled = True):
+		self.enabled  = enabled
+		self.phases   = dict()
+		self.counters = dict()
+
+	def targets(self):
+		# Statistics are also aggregated over the session
+		return (self,) if self is session else (self, session)
+
+	def get_phase(self, name):
+		return self.phases.setdefault(name, {"time": 0., "calls": 0, "peak_bytes": 0})
+
+	@contextmanager
+	def phase(self, name):
+		"""Context manager measuring the wall time of the phase "name" """
+		if not self.enabled:
+			yield
+			return
+
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			elapsed = time.perf_counter() - start
+			for stats in self.targets():
+				phase = stats.get_phase(name)
+				phase["time"]  += elapsed
+				phase["calls"] += 1
+
+	def peak(self, name, nbytes):
+		"""Records that the phase "name" produced an array of "nbytes" bytes"""
+		if self.enabled:
+			for stats in self.targets():
+				phase = stats.get_phase(name)
+				phase["peak_bytes"] = max(phase["peak_bytes"], nbytes)
+
+	def count(self, name, value = 1):
+		"""Adds "value" to counter "name" """
+		if self.enabled:
+			for stats in self.targets():
+				stats.counters[name] = stats.counters.get(name, 0) + value
+
+	def reset(self):
+		self.phases.clear()
+		self.counters.clear()
+
+	def as_dict(self):
+		return {"phases": {name: dict(phase) for name, phase in self.phases.items()}, "counters": dict(self.counters)}
+
+	def __str__(self):
+		lines = ["{:<20} {:>10} {:>8} {:>12}".format("Phase", "time (ms)", "calls", "peak (KiB)")]
+		lines.extend("{:<20} {:>10.2f} {:>8} {:>12.1f}".format(name, phase["time"] * 1000, phase["calls"], phase["peak_bytes"] / 1024)
+		             for name, phase in self.phases.items())
+		lines.extend("{:<20} {:>10}".format(name, value) for name, value in self.counters.items())
+		return "\n".join(lines)
+
+	def __repr__(self):
+		return "Stats({})".format(self.as_dict())
+
+
+# Statistics aggregated over all Exhaust objects created while options.profile is True
+session = Stats()
+
+def reset():
+	"""Resets the statistics aggregated over the session"""
+	session.reset()
@@ -1,25 +1,36 @@
 import numpy as np
-from IPython.display import Math, display, HTML
 import itertools
 
-def getAssignment(n):
-	"""Returns all possible assignment of values to n independent boolean variables"""
-	iterator = [np.array(2**(n-i-1)*(2**(i) * [False] + 2**(i) * [True]), dtype = "bool") for i in range(n)]
-	return np.transpose(np.stack(iterator))
+def getAssignment(n, start = 0, stop = None, bits = None):
+	"""
+	Returns all possible assignment of values to n independent boolean variables
+	If "start" and "stop" are provided, only returns the assignments with index in range(start, stop) (the i-th variable is true in the assignment with index k iff the i-th bit of k is 1)
+	If "bits" (a list of variables) is provided, only these variables take all combinations of values ; the others are false in every assignment (the j-th variable in "bits" plays the role of the j-th variable above)
+	The returned array is a transposed view of getColumns(n, start, stop, bits): the values of every variable are contiguous in memory.
+	"""
+	return getColumns(n, start, stop, bits).T
+
+def getColumns(n, start = 0, stop = None, bits = None):
+	"""
+	Same as getAssignment, transposed: returns a C-contiguous boolean array whose i-th row holds the values of the i-th variable in every assignment
+	"""
+	if bits is None:
+		bits = range(n)
+	if stop is None:
+		stop = 2 ** len(bits)
+	index   = np.arange(start, stop, dtype = "int64")
+	columns = np.zeros((n, stop - start), dtype = "bool")
+	for j, i in enumerate(bits):
+		np.equal((index >> j) & 1, 1, out = columns[i])
+	return columns
 
 def entails(a, b):
 	return np.all(np.logical_or(np.logical_not(a), b))
 
 def remove_doubles(fs):
-	"""Returns a list of elements from iterable fs, without double values"""
+	"""Returns a list of elements from iterable fs, without double values (elements must be hashable ; the first of equal elements is kept)"""
 
-	toReturn = []
-
-	for f in fs:
-		if all(f != g for g in toReturn):
-			toReturn.append(f)
-
-	return toReturn
+	return list(dict.fromkeys(fs))
 
 def get(array, index_tuple):
 	"""Get value from multi-dimensional array "array" at indices specified by tuple "index_tuple" """
@@ -39,6 +50,7 @@ def add_functions_as_methods(fs):
 
 def jprint(*args):
 	"""Replacement for print in IPython"""
+	from IPython.display import display, HTML # imported on first use: IPython is slow to import
 	display(HTML(" ".join(list(map(str, args)))))
 
 
@@ -1,5 +1,4 @@
 import numpy as np
-from IPython.core.display import display, HTML
 
 
 def to_str_list(list_vars):
@@ -106,6 +105,7 @@ class Table:
 
 		self.add("</table>")
 
+		from IPython.display import display, HTML # imported on first use: IPython is slow to import
 		display(HTML(self.cache))
 
 	def print_plain(self):
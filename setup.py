@@ -30,7 +30,8 @@ setup(
       "exh.prop", 
       "exh.exts.gq", 
       "exh.exts.focus", 
-      "exh.fol"
+      "exh.fol",
+      "exh.sat"
     ],
     install_requires = [
         "numpy",
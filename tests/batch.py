@@ -0,0 +1,46 @@
+# %%
+import sys
+# insert at 1, 0 is the script path (or '' in REPL)
+sys.path.insert(1, '../')
+
+# %%
+import pickle
+import exh
+from exh import *
+from exh.exts.gq import *
+
+# IPython is only imported when something is displayed
+assert("IPython" not in sys.modules)
+assert(exh.sat.Solver is not None) # submodules are imported on first access
+
+p1 = Pred(name = "p1", depends = "x")
+p2 = Pred(name = "p2", depends = "x")
+
+# %%
+"""
+# Pickling
+"""
+e = Exh(Exh(Ex > p1 | p2, ii = True), ii = True)
+e_ = pickle.loads(pickle.dumps(e))
+assert(e_.key == e.key)
+assert(np.all(e_.ieSet == e.ieSet) and np.all(e_.iiSet == e.iiSet))
+assert(Universe(f = e).equivalent(e, e_))
+assert(e_.e._u is None) # the universe is not pickled
+
+# %%
+"""
+# Batch exhaustification
+"""
+if __name__ == "__main__": # worker processes may import this module
+	prejacents = [Ex > p1 | p2, a | b | c, Mx > p1, Ax > p1 | p2, Ex > p1 | p2]
+	serial     = [Exh(prejacent, ii = True) for prejacent in prejacents]
+
+	for max_workers in [1, 2]:
+		parallel = exhaust_many(prejacents, ii = True, max_workers = max_workers, chunksize = 2)
+		assert(len(parallel) == len(prejacents))
+
+		for s, p in zip(serial, parallel):
+			assert(s.key == p.key)
+			assert(np.all(s.ieSet == p.ieSet) and np.all(s.iiSet == p.iiSet))
+
+	assert(Pred().idx > p2.idx)
@@ -39,4 +39,78 @@ assert(not (Ex_in_(D4) > Ay_in_(D3) > e).evaluate(
 
 
 # %%
+"""
+# Free variables
+"""
+f = Pred(name = "f", depends = "x")
+g = Pred(name = "g", depends = ["x", "y"])
+universe = Universe(fs = [f, g, a])
 
+for formula in [f, g, f & g, g("y", "x") | ~f, a | f, Ey > g, g("x", "x"), Exh(Ey > g, alts = [Ay > g]),
+                f & (Ax > ~f), Ax > Ey > g("y", "z") | f, Ex > Exh(Ey > g, alts = [Ay > g])]:
+	values = formula.evaluate(assignment = universe.worlds, vm = universe.vm, no_flattening = True)
+	assert(values.shape == (universe.n_worlds,) + (3,) * len(formula.free_vars))
+	assert(np.all(np.moveaxis(formula.evaluate_aux(universe.worlds, universe.vm, free_vars = formula.free_vars), -1, 0) == values))
+
+	# One axis per free variable, in lexical order
+	for t in np.ndindex(*values.shape[1:]):
+		expected = formula.evaluate(assignment = universe.worlds, vm = universe.vm, no_flattening = True, variables = dict(zip(formula.free_vars, t)))
+		assert(np.all(values[(slice(None),) + t] == expected))
+
+assert(np.all((f & ~f).evaluate(f = [True, False, True], no_flattening = True) == False))
+assert(np.all(g.evaluate(g = [[True, False, False], [False, True, False], [False, False, True]]) == np.eye(3, dtype = "bool")[np.newaxis]))
+
+# Quantifiers evaluate their scope for all individuals at once, along an extra axis
+assert(not (Ax > f & (Ex > ~f)).evaluate(f = [True, True, True]))
+assert((Ax > Ey > g("x", "y")).evaluate(g = [[False, True, False], [True, False, False], [False, False, True]]))
+assert(not (Ay > Ex > g("x", "y")).evaluate(g = [[False, True, False], [True, False, False], [False, True, False]]))
+
+# %%
+"""
+# In-place evaluation of operators
+"""
+from exh.prop.formula import fold
+
+# Operators accumulate the values of their children in place, but never modify worlds nor memoized values
+columns = universe.columns.copy()
+for formula in [~a, ~~a, a | f, ~(a & f) | ~a, Ex > ~f & ~g, Exh(Ey > g, alts = [Ay > g]) & ~a]:
+	before = universe.truth_values(formula, no_flattening = True)[0].copy()
+	assert(np.all(universe.truth_values(formula, no_flattening = True)[0] == before))
+	assert(np.all(formula.evaluate(assignment = universe.worlds, vm = universe.vm, no_flattening = True) == before))
+	assert(np.all(universe.columns == columns))
+
+x, y = np.array([True, False, True]), np.array([[True], [False]])
+assert(np.all(fold(np.bitwise_or, [x, y]) == x | y) and np.all(x == [True, False, True]))
+assert(np.all(fold(np.bitwise_and, iter([x & x, y, x])) == (x & y)))
+
+# %%
+"""
+# Evaluation plans
+"""
+from exh.prop.plan import Plan
+from exh.model.cache import TruthCache
+
+# Subformulas shared by the formulas of a batch are compiled into a single instruction
+batch = [Ax > f | g("x", "x"), Ex > f | g("x", "x"), ~(f | g("x", "x")), (Ax > f | g("x", "x")) & a]
+plan  = Plan(batch, free_vars = [[], [], ["x"], []])
+assert(len(plan) == len(set(plan.keys)))
+assert(len(plan) == 8) # f, g(x, x), their disjunction, ~, both quantifiers, a, the conjunction
+
+for formula, values in zip(batch, universe.truth_values(*batch, no_flattening = True)):
+	assert(np.all(formula.evaluate(assignment = universe.worlds, vm = universe.vm, no_flattening = True) == values))
+
+# Subtrees whose values are cached are not executed
+cache = TruthCache()
+universe.truth_values(*batch, cache = cache)
+misses = cache.misses
+universe.truth_values(Ex > f | g("x", "x"), cache = cache)
+assert(cache.misses == misses and cache.hits > 0)
+
+# Registers read by several instructions are never modified in place, even when an instruction returns its input as is (e.g. Named)
+from exh.prop.formula import Named
+
+shared = a & f("x")
+for formula in [Or(Named("n", shared), Not(shared)), Ex > Or(Named("n", shared), ~shared) & (Named("m", shared) | ~shared)]:
+	for cache_size in [0, None]:
+		assert(np.all(Universe(fs = [f, a], cache_size = cache_size).evaluate(formula)))
+	assert(np.all(formula.evaluate(assignment = universe.worlds, vm = universe.vm, no_flattening = True)))
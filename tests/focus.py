@@ -15,6 +15,10 @@ from exh.exts.focus import *
 
 f = Focus(a | b, [b])
 
+# Focused items are equal if their children are, regardless of alternatives ; keys take alternatives into account
+assert(Focus(a | b, [a]) == f and hash(Focus(a | b, [a]) & c) == hash(c & f) and Focus(a | b, [a]).key != f.key)
+assert(Focus(a, [b]) != f)
+
 assignment = np.array([
 	[True,  True], 
 	[True,  False], 
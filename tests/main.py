@@ -76,6 +76,34 @@ assert((a | b) != (a & b))
 # FOL formulas
 assert((Ex > Pred(4, "d1", depends = "x")) == (Ex > d))
 
+# Predicates are equal if they have the same index, variables and domains (their names do not matter) ; "A and A" is then only simplified for the same variables
+from exh.alternatives import simplify_alt
+assert(Pred(4, "d1", depends = "x") == d("x") and d("x") != d("y"))
+assert(Pred(4, "d1", depends = "x") != Pred(4, "d1", depends = "x", domains = [D5]))
+assert(simplify_alt(d("x") & d("x")) == d("x") and simplify_alt(d("x") & d("y")) == d("x") & d("y"))
+
+# Hashing and hash-consing
+assert(hash(a | b) == hash(b | a))
+assert(len({a | b, b | a, a & b, (a | b) & c, c & (b | a)}) == 3)
+assert(((a | b) & c) != ((a | b) | c))
+assert(hashcons(c & (b | a)) is hashcons((a | b) & c))
+assert(hashcons(c & (b | a)).children[1] is hashcons(b | a))
+from exh.utils import remove_doubles
+assert(remove_doubles([a, b | a, a, a | b, c]) == [a, b | a, c])
+
+# Alternatives built by replacing the children of a copy do not keep the free variables or the VarManager of the original, even once interned
+interned_pred = Pred(name = "interned_pred", depends = "x")
+interned_f    = Ex > ~(a | interned_pred)
+interned_exh  = Exh(interned_f)
+Universe(fs = [interned_f, a]).evaluate(interned_exh)
+assert(hashcons(~a).free_vars == [] and hashcons(~a).vm == (~a).vm)
+Exh(~(a & b & c))
+
+# Exh are equal if their prejacents are, including inside other formulas ; keys, which caches rely on, take alternatives into account
+exh1, exh2 = Exh(a | b, alts = [a, b]), Exh(a | b, alts = [a, b, a & b])
+assert(exh1 == exh2 and (exh1 | c) == (c | exh2) and hash(exh1 | c) == hash(exh2 | c))
+assert((exh1 | c).key != (exh2 | c).key and (exh1 | c) != (a | b | c))
+
 
 # %%
 header("EVALUATION")
@@ -245,6 +273,65 @@ h5 = Exh(Exh(a, alts = [a, b]))
 assert(Exh(b, alts = [a]) in h5.alts)
 assert(prop_universe.equivalent(h5, a & ~b))
 
+# Logically equivalent alternatives are merged with "dedup"
+h6 = Exh(a | b, alts = [a, b, a & b, b & (a | b), a & b & a, Ax > a], dedup = True, ii = True)
+assert(h6.alts == [a, b, a & b])
+assert(h6.e.equivalent_alts == [[Ax > a], [b & (a | b)], [a & b & a]])
+assert(prop_universe.equivalent(h6, Exh(a | b, alts = [a, b, a & b], ii = True)))
+
+lines = []
+h6.diagnose(lambda *args: lines.append("".join(map(str, args))))
+assert(lines[0] == "Equivalent alternatives (removed):")
+assert(str(a) + " \u2261 " + str(Ax > a) in lines)
+assert("Innocently excludable: " + str(a & b) in lines)
+
+for engine in ["universe", "sat"]:
+	h7 = Exh(Ex > p1 | (p1 & p2), dedup = True, engine = engine)
+	assert(len(h7.alts) == 8 and len(Exh(Ex > p1 | (p1 & p2)).alts) == 20)
+	assert(quant_universe.equivalent(h7, Exh(Ex > p1 | (p1 & p2))))
+
+# Results of exhaustification are reused by identical Exh objects
+import exh.cache   as cache
+import exh.options as exh_options
+
+hits = cache.results.hits
+h8   = Exh(Exh(a | b | c, ii = True), ii = True)
+assert(cache.results.hits > hits)
+assert(np.all(Exh(a | b | c, ii = True).iiSet == Exh(a | b | c, ii = True).iiSet))
+
+exh_options.exhaust_cache = False
+assert(prop_universe.equivalent(h8, Exh(Exh(a | b | c, ii = True), ii = True)))
+exh_options.exhaust_cache = True
+
+# Time spent in every phase is recorded when options.profile is True
+import exh.stats as stats
+
+assert(not Exh(a | b).stats.phases)
+
+exh_options.profile, exh_options.exhaust_cache = True, False
+stats.reset()
+h9 = Exh(Exh(a | b | c, ii = True), ii = True)
+assert({"alternatives", "universe", "evaluate", "maximal_rows", "excl", "incl"} <= set(h9.stats.phases))
+assert(h9.stats.counters["alternatives"] == len(h9.alts) and h9.stats.counters["worlds"] == 2 ** 3)
+assert(stats.session.phases["excl"]["calls"] > h9.stats.phases["excl"]["calls"]) # the inner Exh objects are counted too
+exh_options.profile, exh_options.exhaust_cache = False, True
+
+# Results are also stored on disk if options.cache_dir is set
+import tempfile
+
+with tempfile.TemporaryDirectory() as directory:
+	exh_options.cache_dir = directory
+	h10 = Exh(Exh(Ex > p1 | p2, ii = True), ii = True)
+
+	cache.results.clear() # as in a new session
+	disk_hits = cache.results.disk_hits
+	h10_ = Exh(Exh(Ex > p1 | p2, ii = True), ii = True)
+	assert(cache.results.disk_hits > disk_hits and len(cache.results.disk()) > 0)
+	assert(np.all(h10.ieSet == h10_.ieSet) and np.all(h10.iiSet == h10_.iiSet))
+	assert(np.all(h10.e.maximalExclSets == h10_.e.maximalExclSets))
+	assert(quant_universe.equivalent(h10, h10_))
+	exh_options.cache_dir = None
+
 
 
 # %%
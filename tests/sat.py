@@ -0,0 +1,91 @@
+
+# %%
+import sys
+# insert at 1, 0 is the script path (or '' in REPL)
+sys.path.insert(1, '../')
+
+# %%
+from exh import *
+from exh.exts.gq import *
+from exh.exts.subdomain import *
+import exh.sat as sat
+from exh.sat import Solver, Encoder
+
+# %%
+"""
+# Solver
+"""
+import itertools
+
+assert([sat.solver.luby(i) for i in range(10)] == [1, 1, 2, 1, 1, 2, 4, 1, 1, 2])
+
+# Pigeonhole principle: 4 pigeons don't fit in 3 holes
+solver = Solver()
+x = {(p, h): solver.new_var() for p in range(4) for h in range(3)}
+for p in range(4):
+	solver.add_clause([x[p, h] for h in range(3)])
+for h in range(3):
+	for p1, p2 in itertools.combinations(range(4), 2):
+		solver.add_clause([-x[p1, h], -x[p2, h]])
+assert(not solver.solve())
+
+# Assumptions
+solver = Solver()
+v1, v2, v3 = solver.new_var(), solver.new_var(), solver.new_var()
+solver.add_clause([v1, v2])
+solver.add_clause([-v1, v3])
+assert(solver.solve())
+assert(not solver.solve([-v2, -v3]))
+assert(solver.solve([-v2]))
+assert(solver.model_value(v1) and solver.model_value(v3))
+
+# %%
+"""
+# Encoding agrees with evaluation
+"""
+d = Pred(name = "d", depends = "x")
+e = Pred(name = "e", depends = ["x", "y"])
+
+formulas = [a & ~b, a | ~c, Ax > d, Ex > Ay > e, Mx > d, Exactly(2, "x") > d, LessThan(2, "x") > d, Ec_x > d]
+universe = Universe(fs = formulas)
+
+for f in formulas:
+	for g in formulas:
+		assert(sat.consistent(f, ~g, vm = universe.vm) == universe.consistent(f, ~g))
+
+# %%
+"""
+# Exhaustification with the SAT engine
+"""
+p1 = Pred(name = "p1", depends = "x")
+p2 = Pred(name = "p2", depends = "x")
+
+prejacents = [a | b | c, Ex > p1 | p2, Exh(Ex > p1 | p2), Mx > p1, Ec_x > p1]
+for prejacent in prejacents:
+	worlds = Exh(prejacent, ii = True)
+	solved = Exh(prejacent, ii = True, engine = "sat")
+	assert(np.all(worlds.ieSet == solved.ieSet))
+	assert(np.all(worlds.iiSet == solved.iiSet))
+	assert(solved.e._u is None) # no world has been enumerated
+
+# Contradictory prejacent
+assert(len(Exh(a & ~a, alts = [b], engine = "sat").ieSet) == 0)
+
+# Free choice
+fc_universe = Universe(fs = [p1, p2])
+fc = Exh(Exh(Ex > p1 | p2, engine = "sat"), engine = "sat")
+assert(fc_universe.entails(fc, Ex > p1))
+assert(fc_universe.entails(fc, Ex > p2))
+
+# Entailment between formulas, without enumerating worlds
+fs       = [a, b, a & b, b & (a | b), a | b, Ex > p1, Ax > p1, Ex > p1 | p2, Ex > p1 & p2]
+fs_u     = Universe(fs = fs)
+expected = np.array([[fs_u.entails(f, g) for g in fs] for f in fs])
+assert(np.all(sat.entailment_matrix(fs, fs_u.vm) == expected))
+assert(sat.entailment_matrix([], fs_u.vm).shape == (0, 0))
+
+# Equivalent alternatives are merged without enumerating worlds
+dedup = Exh(a | b, alts = [a, b, a & b, b & (a | b), a & b & a], dedup = True, ii = True, engine = "sat")
+assert(dedup.alts == [a, b, a & b])
+assert(dedup.e.equivalent_alts == [[], [b & (a | b)], [a & b & a]])
+assert(dedup.e._u is None)
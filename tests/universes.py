@@ -0,0 +1,359 @@
+
+# %%
+import sys
+# insert at 1, 0 is the script path (or '' in REPL)
+sys.path.insert(1, '../')
+
+# %%
+from exh import *
+from exh.model import packed
+from exh.exts.gq import *
+import exh.utils as utils
+
+d = Pred(name = "d", depends = "x")
+e = Pred(name = "e", depends = ["x", "y"])
+
+formulas = [a & b, a | ~c, Ax > d, Ex > Ay > e, Mx > d, Exactly(2, "x") > d, Exh(Ex > d, alts = [Ax > d])]
+universe = Universe(fs = formulas)
+
+# Worlds are stored bit by bit: predicates are evaluated by reading contiguous rows, without copies
+assert(universe.columns.flags["C_CONTIGUOUS"] and np.all(universe.columns.T == utils.getAssignment(universe.n)))
+assert(np.shares_memory(a.evaluate(assignment = universe.worlds, vm = universe.vm, no_flattening = True), universe.columns))
+restricted = universe.filter(Ex > d)
+assert(restricted.columns.flags["C_CONTIGUOUS"])
+assert(np.all(restricted.worlds == utils.getAssignment(universe.n)[universe.evaluate(Ex > d, no_flattening = True)[:, 0]]))
+assert(np.all(Universe(vm = universe.vm, worlds = restricted.worlds).columns == restricted.columns))
+
+# %%
+"""
+# Packed universe
+"""
+
+for n in [1, 3, 6, 7, 9]:
+	assert(np.all(packed.unpack(packed.packed_assignment(n), 2 ** n, axis = 1).T == utils.getAssignment(n)))
+
+packed_universe = PackedUniverse(fs = formulas)
+assert(packed_universe.n_worlds == universe.n_worlds)
+assert(np.all(packed_universe.worlds == universe.worlds))
+assert(np.all(packed_universe.evaluate(*formulas) == universe.evaluate(*formulas)))
+
+assert(packed_universe.consistent(a, b))
+assert(not packed_universe.consistent(Ax > d, Ex > ~d))
+assert(packed_universe.entails(Ax > d, Mx > d))
+assert(not packed_universe.entails(Mx > d, Ax > d))
+assert(packed_universe.equivalent(~(a & b), ~a | ~b))
+
+mask       = universe.evaluate(Ex > d, no_flattening = True)[:, 0]
+restricted = packed_universe.restrict(mask)
+assert(restricted.n_worlds == np.sum(mask))
+assert(np.all(restricted.worlds == universe.restrict(mask).worlds))
+assert(restricted.entails(Ax > d, Mx > d))
+assert(not restricted.consistent(Ax > ~d))
+
+words = packed.pack(np.array([[1, 0, 1], [0, 1, 1], [1, 0, 1], [0, 0, 0]], dtype = "bool"), axis = 1)
+assert(np.all(packed.unique_rows(words) == np.unique(words, axis = 0)))
+assert(np.all(packed.popcount(words, axis = 1) == [2, 2, 2, 0]))
+
+# Maximal sets are the rows not included in any other row
+import exh.alternatives as alternatives
+sets    = packed.pack(np.array([[1, 0, 0], [1, 1, 0], [0, 0, 1], [0, 1, 1], [1, 0, 1]], dtype = "bool"), axis = 1)
+maximal = packed.unpack(alternatives.maximal_rows(sets, batch_size = 1), 3, axis = 1)
+assert(set(map(tuple, maximal)) == {(True, True, False), (False, True, True), (True, False, True)})
+
+# Exhaustification is the same with either universe
+p1 = Pred(name = "p1", depends = "x")
+p2 = Pred(name = "p2", depends = "x")
+
+for prejacent in [a | b | c, Ex > p1 | p2]:
+	dense  = Exh(prejacent, ii = True)
+	packed_exh = Exh(prejacent, ii = True, universe = PackedUniverse)
+	assert(np.all(dense.ieSet == packed_exh.ieSet))
+	assert(np.all(dense.iiSet == packed_exh.iiSet))
+
+# %%
+"""
+# Streaming universe
+"""
+
+assert(np.all(utils.getAssignment(5, 7, 19) == utils.getAssignment(5)[7:19]))
+
+streaming_universe = StreamingUniverse(fs = formulas, chunk_size = 10)
+assert(streaming_universe.n_worlds == universe.n_worlds)
+assert(np.all(streaming_universe.worlds == universe.worlds))
+assert(np.all(streaming_universe.evaluate(*formulas) == universe.evaluate(*formulas)))
+assert(streaming_universe.entails(Ax > d, Mx > d))
+assert(streaming_universe.equivalent(~(a & b), ~a | ~b))
+assert(not streaming_universe.consistent(Ax > d, Ex > ~d))
+
+filtered = streaming_universe.filter(Ex > d, a)
+assert(filtered.n_worlds == universe.filter(Ex > d, a).n_worlds)
+assert(np.all(filtered.worlds == universe.filter(Ex > d, a).worlds))
+assert(not filtered.consistent(Ax > ~d))
+assert(not filtered.consistent(~a))
+
+for prejacent in [a | b | c, Ex > p1 | p2]:
+	dense     = Exh(prejacent, ii = True)
+	streaming = Exh(prejacent, ii = True, universe = StreamingUniverse)
+	assert(np.all(dense.ieSet == streaming.ieSet))
+	assert(np.all(dense.iiSet == streaming.iiSet))
+
+# %%
+"""
+# Memory-mapped universe
+"""
+
+memmap_universe = MemmapUniverse(fs = formulas, chunk_size = 10)
+assert(isinstance(memmap_universe.worlds, np.memmap))
+assert(memmap_universe.n_worlds == universe.n_worlds)
+assert(np.all(memmap_universe.worlds == universe.worlds))
+assert(np.all(memmap_universe.evaluate(*formulas) == universe.evaluate(*formulas)))
+assert(memmap_universe.entails(Ax > d, Mx > d))
+assert(not memmap_universe.consistent(Ax > d, Ex > ~d))
+
+filtered = memmap_universe.filter(Ex > d).filter(a)
+assert(filtered.base is memmap_universe.base) # worlds are not copied
+assert(np.all(filtered.worlds == universe.filter(Ex > d, a).worlds))
+assert(np.all(filtered.restrict([0, 2]).worlds == universe.filter(Ex > d, a).worlds[[0, 2]]))
+assert(not filtered.consistent(~a))
+
+for prejacent in [a | b | c, Ex > p1 | p2]:
+	dense      = Exh(prejacent, ii = True)
+	memmap_exh = Exh(prejacent, ii = True, universe = MemmapUniverse)
+	assert(np.all(dense.ieSet == memmap_exh.ieSet))
+	assert(np.all(dense.iiSet == memmap_exh.iiSet))
+
+# %%
+"""
+# BDD universe
+"""
+
+bdd_universe = BDDUniverse(fs = formulas)
+assert(bdd_universe.n_worlds == universe.n_worlds)
+assert(np.all(bdd_universe.worlds == universe.worlds))
+assert(np.all(bdd_universe.evaluate(*formulas) == universe.evaluate(*formulas)))
+
+for f in formulas:
+	assert(bdd_universe.count(f) == np.sum(universe.evaluate(f, no_flattening = True)))
+	for g in formulas:
+		assert(bdd_universe.entails(f, g) == universe.entails(f, g))
+		assert(bdd_universe.equivalent(f, g) == universe.equivalent(f, g))
+		assert(bdd_universe.consistent(f, g) == universe.consistent(f, g))
+
+filtered = bdd_universe.filter(Ex > d, a)
+assert(filtered.n_worlds == universe.filter(Ex > d, a).n_worlds)
+assert(np.all(filtered.worlds == universe.filter(Ex > d, a).worlds))
+assert(not filtered.consistent(Ax > ~d))
+assert(filtered.entails(Ax > ~d, ~a))
+
+# Maximal sets are the same as those found by enumerating worlds
+props = [Ax > d, Mx > d, ~a, b | c, Ey > Ax > e]
+as_set = lambda sets: set(map(tuple, np.array(sets, dtype = "bool")))
+assert(as_set(alternatives.find_maximal_sets(filtered, props)) == as_set(alternatives.find_maximal_sets(universe.filter(Ex > d, a), props)))
+
+for prejacent in [a | b | c, Ex > p1 | p2, Mx > p1]:
+	dense = Exh(prejacent, ii = True)
+	bdd   = Exh(prejacent, ii = True, universe = BDDUniverse)
+	assert(np.all(dense.ieSet == bdd.ieSet))
+	assert(np.all(dense.iiSet == bdd.iiSet))
+
+# %%
+"""
+# Truth-value cache
+"""
+from exh.model.cache import TruthCache
+
+cached = Universe(fs = formulas)
+assert(np.all(cached.evaluate(*formulas) == universe.evaluate(*formulas, cache = None)))
+
+# Shared subformulas are only evaluated once ; negations reuse the values of their child
+# Formulas evaluated together share their subformulas in a plan: "a & b" is only looked up once
+misses, hits = cached.cache.misses, cached.cache.hits
+assert(np.all(cached.evaluate(~(a & b), (a & b) | c) == universe.evaluate(~(a & b), (a & b) | c, cache = None)))
+assert(cached.cache.misses == misses + 1)
+assert(cached.cache.hits == hits + 1)
+
+# Structurally equal formulas share their entries
+misses = cached.cache.misses
+cached.evaluate(b & a, Ex > d)
+assert(cached.cache.misses == misses)
+
+# Keys include the sizes of domains: quantifiers over different domains do not share their values
+d5, d3 = Pred(name = "d5", depends = "x", domains = [D5]), Pred(name = "d3", depends = "x", domains = [D3])
+d5_3   = Pred(d5.idx, "d5", "x", domains = [D3])
+assert(d5 != d5_3 and d5.key != d5_3.key)
+assert(Universal("x", a, domain = D3).key != Universal("x", a, domain = D5).key)
+for cache_size in [None, 0]:
+	u = Universe(fs = [d3, d5], cache_size = cache_size)
+	assert(list(u.evaluate(Universal("x", d3, domain = D3), Universal("x", d5, domain = D5)).sum(axis = 0)) == [2 ** 5, 2 ** 3])
+
+# Quantifiers cannot range over a domain other than the one of their scope
+try:
+	Universe(f = d5).evaluate(Universal("x", d5, domain = D3))
+	raised = False
+except Exception:
+	raised = True
+assert(raised)
+
+# Least recently used values are evicted beyond the maximal size
+small = Universe(fs = formulas, cache_size = 2 * universe.n_worlds)
+small.evaluate(a & b, a | b, b | c)
+assert(len(small.cache) == 2 and small.cache.size <= 2 * universe.n_worlds)
+assert(np.all(small.evaluate(a & b) == universe.evaluate(a & b, cache = None)))
+
+# %%
+"""
+# Symmetric universe
+"""
+from exh.exts.subdomain import SubdomainExistential
+
+assert(all(f.symmetric() for f in formulas))
+symmetric_universe = SymmetricUniverse(fs = formulas)
+assert(np.sum(symmetric_universe.weights) == universe.n_worlds)
+assert(symmetric_universe.n_worlds < universe.n_worlds)
+
+for f in formulas:
+	assert(symmetric_universe.count(f) == np.sum(universe.evaluate(f, no_flattening = True)))
+	for g in formulas:
+		assert(symmetric_universe.entails(f, g) == universe.entails(f, g))
+		assert(symmetric_universe.consistent(f, g) == universe.consistent(f, g))
+
+assert(not SubdomainExistential("x", d, mask = np.array([True, False, True])).symmetric())
+assert(not d.symmetric())
+try:
+	symmetric_universe.evaluate(d, variables = {"x": 0})
+	assert(False)
+except ValueError:
+	pass
+
+filtered = symmetric_universe.filter(Ex > d)
+assert(filtered.count(Ax > d) == np.sum(universe.evaluate(Ax > d, no_flattening = True)))
+
+for prejacent in [a | b | c, Ex > p1 | p2, Mx > p1, Exactly(2, "x") > p1 | p2]:
+	dense     = Exh(prejacent, ii = True)
+	symmetric = Exh(prejacent, ii = True, universe = SymmetricUniverse)
+	assert(isinstance(symmetric.e.u, SymmetricUniverse))
+	assert(np.all(dense.ieSet == symmetric.ieSet))
+	assert(np.all(dense.iiSet == symmetric.iiSet))
+
+# Formulas which single out individuals are exhaustified against all worlds
+assert(not isinstance(Exh(Ex > d, alts = [SubdomainExistential("x", d, mask = np.array([True, False, False]))], universe = SymmetricUniverse).e.u, SymmetricUniverse))
+
+# %%
+"""
+# Fingerprints
+"""
+equivalents = [~(a & b), ~a | ~b, Ax > d, ~(Ex > ~d), a]
+for u in [universe, packed_universe, streaming_universe, memmap_universe, bdd_universe, symmetric_universe]:
+	prints = u.fingerprints(*equivalents)
+	assert(prints[0] == prints[1] and prints[2] == prints[3])
+	assert(len(set(prints)) == 3)
+
+# %%
+"""
+# Witnesses and early exit
+"""
+for u in [universe, packed_universe, streaming_universe, memmap_universe, bdd_universe, symmetric_universe]:
+	holds = lambda f, world: Universe(vm = universe.vm, worlds = world[np.newaxis]).evaluate(f)
+
+	world = u.witness(Ax > d, ~a)
+	assert(world.shape == (universe.n,) and holds(Ax > d, world) and not holds(a, world))
+	assert(u.witness(Ax > d, Ex > ~d) is None)
+
+	world = u.counterexample(Mx > d, Ax > d)
+	assert(holds(Mx > d, world) and not holds(Ax > d, world))
+	assert(u.counterexample(Ax > d, Mx > d) is None)
+
+	world = u.difference(a & b, a | b)
+	assert(holds(a, world) != holds(b, world))
+	assert(u.difference(~(a & b), ~a | ~b) is None)
+
+# In a universe without worlds, nothing is consistent and everything is entailed
+for u in [universe, packed_universe, memmap_universe, streaming_universe.filter(a, ~a)]:
+	empty = u.restrict(np.array([], dtype = "int64")) if not isinstance(u, StreamingUniverse) else u
+	assert(empty.n_worlds == 0 and empty.witness(a) is None)
+	assert(not empty.consistent(a) and empty.entails(a, b) and empty.equivalent(a, ~a))
+
+# Queries stop at the first chunk of worlds settling them ; chunks and their caches are reused from one query to the next
+import exh.model.options as model_options
+
+chunked = Universe(fs = formulas)
+assert(chunked.n_worlds > model_options.query_chunk_size)
+assert(chunked.consistent(Ex > d) and len(chunked.chunk_caches) == 1)
+assert(chunked.entails(Ax > d, Mx > d) and len(chunked.chunk_caches) == len(list(chunked.chunk_bounds())))
+assert(sum(stop - start for start, stop in chunked.chunk_bounds()) == chunked.n_worlds)
+
+misses = sum(cache.misses for cache in chunked.chunk_caches.values())
+assert(chunked.equivalent(Ax > d, ~(Ex > ~d)))
+assert(not chunked.equivalent(Ax > d, Mx > d))
+assert(sum(cache.misses for cache in chunked.chunk_caches.values()) == misses + len(chunked.chunk_caches))
+
+# %%
+"""
+# Entailment matrices
+"""
+rows = packed.pack(np.array([[1, 0, 0], [1, 1, 0], [0, 0, 0], [1, 1, 0]], dtype = "bool"), axis = 1)
+for batch_size in [1, 2 ** 22]:
+	assert(np.all(packed.inclusion_matrix(rows, batch_size = batch_size) == [[1, 1, 0, 1], [0, 1, 0, 1], [1, 1, 1, 1], [0, 1, 0, 1]]))
+
+fs = formulas + [~(Ex > ~d), Ex > d, a, b | a]
+expected = np.array([[universe.entails(f, g) for g in fs] for f in fs])
+for u in [universe, packed_universe, streaming_universe, memmap_universe, bdd_universe, symmetric_universe]:
+	assert(np.all(u.entailment_matrix(*fs) == expected))
+	assert(np.all(u.equivalence_matrix(*fs) == expected & expected.T))
+
+for engine in ["universe", "sat"]:
+	exhaust  = Exh(Ex > p1 | p2, engine = engine, dedup = False).e
+	alts_u   = Universe(fs = exhaust.alts)
+	expected = np.array([[alts_u.entails(f, g) for g in exhaust.alts] for f in exhaust.alts])
+	assert(np.all(exhaust.entailment_matrix() == expected))
+	assert(np.all(np.diag(exhaust.equivalence_matrix())))
+
+# %%
+"""
+# Projection on the bits read by formulas
+"""
+from exh.model import projection
+import exh.options as exh_options
+from exh.exts.subdomain import SubdomainExistential
+
+# Cone of influence of formulas
+vm = universe.vm
+assert((Ax > d).bits(vm) == projection.predicate_bits(d, vm))
+assert(d.bits(vm, {"x": 1}) == [vm.index(d.idx, [1])])
+assert(SubdomainExistential("x", d, mask = np.array([True, False, True])).bits(vm) == [vm.index(d.idx, [0]), vm.index(d.idx, [2])])
+assert((a | (Ex > d)).bits(vm) == sorted(a.bits(vm) + d.bits(vm, {"x": 0}) + d.bits(vm, {"x": 1}) + d.bits(vm, {"x": 2})))
+assert(projection.relevant_bits([a, e("x", "x")], vm, {"x": 2}) == sorted(a.bits(vm) + [vm.index(e.idx, [2, 2])]))
+
+assert(projection.independent_groups([[0, 1], [2], [1, 3], [], [2, 4]]) == [([0, 2], [0, 1, 3]), ([1, 4], [2, 4]), ([3], [])])
+
+# Universes only enumerate the bits read ; the others are false
+assert(np.all(utils.getAssignment(4, bits = [1, 3]) == utils.getAssignment(4)[[0, 2, 8, 10]]))
+assert(np.all(packed.unpack(packed.packed_assignment(8, bits = [0, 7]), 4, axis = 1).T == utils.getAssignment(8, bits = [0, 7])))
+
+bits = projection.relevant_bits([Ax > d, a | b], vm)
+for cls in [Universe, PackedUniverse, StreamingUniverse, MemmapUniverse]:
+	projected = cls(vm = vm, bits = bits)
+	assert(projected.n_worlds == 2 ** len(bits))
+	assert(np.all(projected.worlds == utils.getAssignment(vm.n, bits = bits)))
+	assert(projected.entails(Ax > d, Mx > d) and not projected.consistent(Ax > d, Ex > ~d) and projected.consistent(a, ~b))
+
+# Exhaustification is the same with or without projection: embedded Exh only enumerate the bits of their free variable's dummy value,
+# and alternatives reading disjoint bits are exhaustified group by group
+q = Pred(name = "q", depends = "x")
+for make in [lambda: Ax > Exh(p1 | p2, ii = True),
+             lambda: Exh(a | b, alts = [a, b, a & b, c, Ex > q], ii = True),
+             lambda: Exh(a | b, alts = [a, b, c | (Ex > q), c, Ex > q], ii = True),
+             lambda: Exh(Ex > p1 | p2, ii = True)]:
+	exh_options.project = False
+	full = make()
+	exh_options.project = True
+	projected = make()
+	assert(Universe(fs = [full, projected]).equivalent(full, projected))
+
+exh_options.exhaust_cache = False
+assert((Ax > Exh(p1 | p2)).children[0].e.u.n_worlds == 4)
+
+# Maximal sets are the combinations of the maximal sets of every group: {~a, ~c} and {~b, ~c}
+factored = Exh(a | b, alts = [a, b, c]).e
+assert(as_set(factored.maximalExclSets) == {(True, False, True), (False, True, True)})
+exh_options.exhaust_cache = True
@@ -17,8 +17,37 @@ assert(vm.pred_to_vm_index == {2: 0, 5: 1})
 assert(vm.offset           == [0, 12])
 assert(vm.index(5, (2, 1)) == 3 * 4 + 2 + 6 * 1)
 
+# VarManagers are interned and merges are memoized
+vm_a = VarManager.get({2: [3, 4]}, {2: "a"})
+vm_b = VarManager.get({5: [6, 3]}, {5: "b"})
+assert(vm_a is VarManager.get({2: [3, 4]}, {2: "a"}))
+assert(VarManager.merge(vm_a, vm_b) == vm)
+assert(VarManager.merge(vm_a, vm_b) is VarManager.merge(vm_a, vm_b))
+assert(VarManager.merge(vm_a) is vm_a)
+
+# VarManagers no longer used are not kept by the interning table (merges only keep a bounded number of them)
+import gc
+signature = VarManager.get({7: [3]}, {7: "g"}).signature
+VarManager.merges.clear()
+gc.collect()
+assert(signature not in VarManager.interned and vm_a.signature in VarManager.interned)
+
 
 
 
 # %%
 
+# VarManagers of formulas follow changes of the size of default domains, including for predicates created beforehand
+from exh import *
+import exh.model.options as options
+
+dq = Pred(name = "dq", depends = "x")
+old_formula = Ax > dq
+options.dom_quant = 5
+
+assert(Universe(f = Ax > dq).evaluate(Ax > dq).shape == (2 ** 5, 1))
+assert(Universe(f = old_formula).n_worlds == 2 ** 5 and old_formula.vm.preds[dq.idx] == [5])
+assert(Exh(Ex > dq).e.u.n_worlds == 2 ** 5)
+
+options.dom_quant = 3
+assert(Universe(f = Ax > dq).n_worlds == 2 ** 3)